@@ -1,229 +1,332 @@
 # app.py
 import logging
-from logging.handlers import RotatingFileHandler
-from flask_migrate import Migrate
-from flask import (Flask, render_template, redirect, url_for, flash, request, send_file, make_response, jsonify)
+from flask import (Flask, Blueprint, current_app, render_template, redirect, url_for, flash, request,
+                   jsonify, Response, stream_with_context, abort)
 from flask_wtf import CSRFProtect
 from flask_wtf.csrf import generate_csrf
 from config import Config
-from models.models import db, Transaction, Category, Budget, RecurringTransaction, SavingsAccount
+from models.models import db, Transaction, Category, Budget, RecurringTransaction, SavingsAccount, MonthlyRollup, FrequencyEnum
 from forms.forms import TransactionForm, BudgetForm, ImportForm, SavingsForm
-from utils.helpers import process_recurring_transactions
+from utils.helpers import process_recurring_transactions, month_bounds
+from utils.rollup import closed_month_totals, current_month_totals, month_key, rebuild_rollup
+from utils.export import EXPORT_FORMATS, STREAMERS, export_query
+from utils.importer import import_file
+from utils.jobs import ImportJobManager
+from utils.app_state import PerApp
+from utils.reports import REPORT_TYPES, build_report
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, transaction_page, serialize_transaction
+from utils.versioning import conditional_get, current_versions, TRANSACTIONS, CATEGORIES, BUDGETS, RECURRING, SAVINGS
+from utils.cache import cache, HISTORY_TAG, month_tag, budget_month_tag, range_month_tags
+from utils.metrics import metrics
+from utils.storage import init_storage
+from utils.writer import writes, WriteRejected
+from utils.logging_config import logging_pipeline
+from utils.money import ZERO
+from utils.budgets import spent_by_category, budget_alerts_for_month, serialize_alert
+from utils.search import (DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE, install_search_index,
+                          rebuild_search_index, search_transactions)
+from utils.analytics import (category_trends, balance_series, DEFAULT_TREND_MONTHS, DEFAULT_MOVING_AVERAGE,
+                             MAX_TREND_MONTHS)
+from utils.scheduler import scheduler_election
+from utils.categories import category_registry
+from utils.recurrence import MAX_EXPANSION_DAYS, calendar_events, recurring_forecast
+from utils.batch import (parse_selection, transaction_changes, budget_changes, budget_filters, batch_transactions,
+                         batch_budgets)
+from sqlalchemy import inspect as sa_inspect, Integer
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import Column, String, Float, DateTime, extract
+from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 from collections import defaultdict
-import os
-import csv
 import json
-import pandas as pd
-from io import StringIO, BytesIO
 import atexit
-import traceback
+import click
+
+# Named explicitly so records are routed the same when run as __main__
+logger = logging.getLogger('app')
+
+# Extensions are created unbound and attached to an app in create_app(); the
+# stateful ones keep a separate instance per app in app.extensions
+csrf = CSRFProtect()
+import_jobs = PerApp('import_jobs', ImportJobManager)
+
+# cli_group=None keeps the commands at the top level (flask init-db, not flask main init-db)
+bp = Blueprint('main', __name__, cli_group=None)
+
+DEFAULT_CATEGORIES = [
+    ('Salary', 'Income'),
+    ('Freelance', 'Income'),
+    ('Food', 'Expense'),
+    ('Rent', 'Expense'),
+    ('Utilities', 'Expense'),
+    ('Entertainment', 'Expense'),
+]
+
+# -------------------- Application Factory -------------------- #
+
+def create_app(config_class=Config):
+    """
+    Build the application without touching the database or starting threads.
+
+    Schema creation and seeding are explicit (flask init-db / flask seed), and
+    the recurring-transaction scheduler only starts where RUN_SCHEDULER is set
+    (and, with leader election, only in the process holding the lease).
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+
+    # Console and rotating file output happen on a background listener thread;
+    # levels come from APP_ENV / LOG_LEVEL (see config.py)
+    logging_pipeline.init_app(app)
+
+    init_storage(app, db)  # db.init_app plus the SQLite storage profile
+    csrf.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        # Alembic is only needed by `flask db ...`; serving processes skip its ~0.5s import
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    category_registry.init_app(app)
+    request_metrics = metrics.init_app(app)
+    request_metrics.add_collector(cache.init_app(app).prometheus_lines)
+    request_metrics.add_collector(writes.init_app(app).prometheus_lines)
+    import_jobs.init_app(app)
+    app.register_blueprint(bp)
+
+    if app.config['RUN_SCHEDULER']:
+        start_scheduling(app)
+    atexit.register(shutdown_background_work, app)
+    return app
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
-csrf = CSRFProtect(app)
-
-migrate = Migrate(app, db)
-
-# -------------------- Logging Configuration -------------------- #
-
-# Create a logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)  # Set to DEBUG for comprehensive logging
-
-# Create log directory if it doesn't exist
-if not os.path.exists('logs'):
-    os.mkdir('logs')
-
-# File handler with rotation
-file_handler = RotatingFileHandler('logs/app.log', maxBytes=10*1024*1024, backupCount=5)
-file_handler.setLevel(logging.INFO)  # File handler logs INFO and above
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)  # Console handler logs DEBUG and above
-
-# Formatter
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
-
-# Add handlers to the logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# -------------------- Database Initialization -------------------- #
 
-logger.info("Application startup initiated.")
+def seed_default_categories():
+    """Create the default categories if there are none; return how many were added."""
+    if Category.query.first():
+        return 0
+    db.session.add_all(Category(name=name, type=type_) for name, type_ in DEFAULT_CATEGORIES)
+    db.session.commit()
+    return len(DEFAULT_CATEGORIES)
+
+def money_migration_pending():
+    """True while transaction amounts are still stored as decimals, before `flask db upgrade` converts them to cents."""
+    for column in sa_inspect(db.session.connection()).get_columns('transaction'):
+        if column['name'] == 'amount':
+            return not isinstance(column['type'], Integer)
+    return False
+
+def init_database():
+    """Create missing tables and the search index, seed default categories and backfill derived tables."""
+    db.create_all()
+    logger.info("Database tables created successfully.")
+    if seed_default_categories():
+        logger.info("Default categories initialized.")
+    if money_migration_pending():
+        # Totals derived now would be in dollars; the migration fills the derived tables once amounts are cents
+        logger.warning("Amounts are not stored as cents yet; run `flask --app app db upgrade` to convert them.")
+        db.session.commit()
+        return
+    # Populate the rollup table for ledgers created before it existed
+    if Transaction.query.first() and not MonthlyRollup.query.first():
+        rows = rebuild_rollup()
+        logger.info("Monthly rollup populated with %s rows.", rows)
+    # Likewise the search index, for ledgers created before it existed
+    if install_search_index(db.session.connection()) and Transaction.query.first():
+        rows = rebuild_search_index()
+        logger.info("Search index populated with %s transactions.", rows)
+    db.session.commit()
 
 # -------------------- Scheduler Setup -------------------- #
 
-# Initialize Scheduler
-scheduler = BackgroundScheduler()
-scheduler.add_job(
-    func=process_recurring_transactions,
-    trigger="interval",
-    days=1,
-    id='process_recurring_transactions',
-    name='Process recurring transactions daily',
-    replace_existing=True
-)
-scheduler.start()
-logger.info("Background scheduler started.")
-
-# Ensure scheduler is shut down when exiting the app
-atexit.register(lambda: shutdown_scheduler())
-
-def shutdown_scheduler():
-    try:
+def run_recurring_job(app):
+    election = scheduler_election.for_app(app)
+    if election is not None and election.running and not election.is_leader():
+        # The lease lapsed since this run was scheduled; the new leader will post instead
+        logger.info("Skipping recurring job: this process is not the scheduler leader.")
+        return
+    # Scheduler threads have no app context of their own
+    with app.app_context():
+        try:
+            posted = process_recurring_transactions()
+            logger.info("Recurring job posted %s transactions.", posted)
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error processing recurring transactions: %s", e)
+            logger.debug("Traceback:", exc_info=True)
+
+def start_scheduler(app):
+    """Start the daily recurring-transaction job; the first run fires now to catch up missed occurrences."""
+    # Imported here so processes that never schedule never load APScheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        func=run_recurring_job,
+        args=[app],
+        trigger="interval",
+        days=1,
+        next_run_time=datetime.now(),
+        id='process_recurring_transactions',
+        name='Process recurring transactions daily',
+        replace_existing=True
+    )
+    scheduler.start()
+    app.extensions['scheduler'] = scheduler
+    logger.info("Background scheduler started.")
+    return scheduler
+
+def stop_scheduler(app):
+    scheduler = app.extensions.pop('scheduler', None)
+    if scheduler is not None:
         scheduler.shutdown()
         logger.info("Background scheduler shut down successfully.")
-    except Exception as e:
-        logger.error(f"Error shutting down scheduler: {e}")
-        logger.debug(traceback.format_exc())
 
-# -------------------- Database Initialization -------------------- #
-
-with app.app_context():
+def start_scheduling(app):
+    """
+    Run the scheduler in this process. With SCHEDULER_LEADER_ELECTION, every
+    RUN_SCHEDULER worker joins the election instead and the scheduler runs only
+    while this process holds the lease, so N workers still post each recurrence once.
+    """
+    if not app.config['SCHEDULER_LEADER_ELECTION']:
+        return start_scheduler(app)
+    scheduler_election.init_app(app).start(on_elected=start_scheduler, on_demoted=stop_scheduler)
+
+def shutdown_background_work(app):
     try:
-        db.create_all()
-        logger.info("Database tables created successfully.")
-        # Initialize default categories if not present
-        if not Category.query.first():
-            default_categories = [
-                Category(name='Salary', type='Income'),
-                Category(name='Freelance', type='Income'),
-                Category(name='Food', type='Expense'),
-                Category(name='Rent', type='Expense'),
-                Category(name='Utilities', type='Expense'),
-                Category(name='Entertainment', type='Expense')
-            ]
-            db.session.add_all(default_categories)
-            db.session.commit()
-            logger.info("Default categories initialized.")
+        election = scheduler_election.for_app(app)
+        if election is not None:
+            election.stop()  # Releases the lease, so a peer takes over promptly
+        stop_scheduler(app)
+        import_jobs.for_app(app).shutdown()
+        writes.for_app(app).shutdown()
     except Exception as e:
-        logger.error(f"Error during database initialization: {e}")
-        logger.debug(traceback.format_exc())
+        logger.error("Error shutting down background work: %s", e)
+        logger.debug("Traceback:", exc_info=True)
+
+# -------------------- CLI Commands -------------------- #
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the database tables and seed the default categories."""
+    init_database()
+    print("Database initialized.")
+
+@bp.cli.command('seed')
+def seed_command():
+    """Add the default categories to an empty database."""
+    added = seed_default_categories()
+    print(f"Added {added} default categories." if added else "Categories already exist; nothing to seed.")
+
+@bp.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """Recompute the monthly rollup table from all transactions."""
+    rows = rebuild_rollup()
+    logger.info("Monthly rollup rebuilt with %s rows.", rows)
+    print(f"Monthly rollup rebuilt with {rows} rows.")
+
+@bp.cli.command('rebuild-search')
+def rebuild_search_command():
+    """Create the transaction search index if needed and re-index every description."""
+    rows = rebuild_search_index()
+    logger.info("Search index rebuilt with %s transactions.", rows)
+    print(f"Search index rebuilt with {rows} transactions.")
+
+@bp.cli.command('process-recurring')
+def process_recurring_command():
+    """Post every due recurring transaction occurrence now."""
+    posted = process_recurring_transactions()
+    print(f"Posted {posted} recurring transactions.")
+
+@bp.cli.command('generate-ledger')
+@click.option('--transactions', default=10000, show_default=True, help='Number of transactions to generate.')
+@click.option('--years', default=3, show_default=True, help='Years of history, ending today.')
+@click.option('--seed', default=42, show_default=True, help='Random seed; the same seed yields the same ledger.')
+def generate_ledger_command(transactions, years, seed):
+    """Fill the database with a synthetic ledger for benchmarking."""
+    from utils.synthetic import generate_ledger
+
+    summary = generate_ledger(transactions=transactions, years=years, seed=seed)
+    print(f"Generated {summary['transactions']} transactions and {summary['budgets']} budgets "
+          f"from {summary['start']} to {summary['end']}.")
 
 # -------------------- Routes -------------------- #
 
-@app.context_processor
+@bp.app_context_processor
 def inject_csrf_token():
     return dict(csrf_token=generate_csrf())
 
-@app.route('/')
+@bp.app_template_filter('category_name')
+def category_name_filter(category_id):
+    return category_registry.get().name(category_id)
+
+@bp.app_template_filter('category_type')
+def category_type_filter(category_id):
+    return category_registry.get().type(category_id)
+
+@bp.route('/')
+@conditional_get(TRANSACTIONS, CATEGORIES, per_day=True)
 def dashboard():
     logger.debug("Accessed dashboard route.")
     try:
-        # Process recurring transactions
-        process_recurring_transactions()
-        logger.debug("Processed recurring transactions.")
-
         # Get today's date
         today = datetime.today().date()
 
-        # Fetch total income and expenses up to today
-        total_income = db.session.query(
-            db.func.sum(Transaction.amount)
-        ).join(Category).filter(
-            Category.type == 'Income',
-            Transaction.date <= today  # Exclude future transactions
-        ).scalar() or 0
-
-        total_expense = db.session.query(
-            db.func.sum(Transaction.amount)
-        ).join(Category).filter(
-            Category.type == 'Expense',
-            Transaction.date <= today  # Exclude future transactions
-        ).scalar() or 0
+        # Per-month, per-category totals up to today: closed months from the rollup
+        # table, the current month aggregated live; both cached until a write touches them
+        current_month = month_key(today)
+        monthly_totals = cache.get_or_compute(
+            ('closed_month_totals', current_month),
+            lambda: [tuple(row) for row in closed_month_totals(today)],
+            tags={HISTORY_TAG}
+        ) + cache.get_or_compute(
+            ('current_month_totals', today),
+            lambda: [tuple(row) for row in current_month_totals(today)],
+            tags={month_tag(current_month)}
+        )
+
+        total_income = sum((row[3] for row in monthly_totals if row[2] == 'Income'), Decimal(0))
+        total_expense = sum((row[3] for row in monthly_totals if row[2] == 'Expense'), Decimal(0))
 
         balance = total_income - total_expense
-        logger.debug(f"Total income: {total_income}, Total expense: {total_expense}, Balance: {balance}")
 
         # Calculate Savings Rate
         if total_income > 0:
             savings_rate = ((total_income - total_expense) / total_income) * 100
         else:
             savings_rate = 0
-        logger.debug(f"Savings rate: {savings_rate}%")
 
-        # Fetch expenses by category up to today for visualization
-        expenses = db.session.query(
-            Category.name,
-            db.func.sum(Transaction.amount)
-        ).join(Transaction).filter(
-            Category.type == 'Expense',
-            Transaction.date <= today  # Exclude future transactions
-        ).group_by(Category.name).all()
+        # Expenses by category for visualization
+        expenses_by_category = defaultdict(Decimal)
+        for month, category_name, category_type, total in monthly_totals:
+            if category_type == 'Expense':
+                expenses_by_category[category_name] += total
 
-        categories = [e[0] for e in expenses]
-        amounts = [e[1] for e in expenses]
-        logger.debug(f"Expenses by category: {dict(zip(categories, amounts))}")
+        categories = sorted(expenses_by_category)
+        amounts = [expenses_by_category[name] for name in categories]
 
         # Fetch recent transactions up to today
         recent_transactions = Transaction.query.filter(Transaction.date <= today)\
             .order_by(Transaction.date.desc()).limit(5).all()
-        logger.debug(f"Fetched {len(recent_transactions)} recent transactions.")
-
-        # Fetch recurring transactions for calendar events
-        recurring_transactions = RecurringTransaction.query.all()
-        calendar_events = []
-        for rt in recurring_transactions:
-            if hasattr(rt, 'description') and hasattr(rt, 'amount') and hasattr(rt, 'next_date'):
-                event = {
-                    'title': f"{rt.description} - ${rt.amount}",
-                    'start': rt.next_date.strftime('%Y-%m-%d'),
-                    'allDay': True
-                }
-                calendar_events.append(event) 
-        logger.debug(f"Fetched {len(calendar_events)} recurring transactions for calendar events.")
 
         # Fetch upcoming transactions (future-dated)
         upcoming_transactions = Transaction.query.filter(Transaction.date > today)\
             .order_by(Transaction.date.asc()).limit(5).all()
-        logger.debug(f"Fetched {len(upcoming_transactions)} upcoming transactions.")
-
-        # Fetch income and expenses over time (monthly)
-        income_over_time = db.session.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            db.func.sum(Transaction.amount).label('income')
-        ).join(Category).filter(
-            Category.type == 'Income',
-            Transaction.date <= today
-        ).group_by('year', 'month').order_by('year', 'month').all()
-
-        expenses_over_time = db.session.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            db.func.sum(Transaction.amount).label('expense')
-        ).join(Category).filter(
-            Category.type == 'Expense',
-            Transaction.date <= today
-        ).group_by('year', 'month').order_by('year', 'month').all()
 
         # Combine income and expenses by month
-        income_dict = defaultdict(float)
-        for record in income_over_time:
-            key = f"{int(record.year)}-{int(record.month):02d}"
-            income_dict[key] = float(record.income)
-
-        expenses_dict = defaultdict(float)
-        for record in expenses_over_time:
-            key = f"{int(record.year)}-{int(record.month):02d}"
-            expenses_dict[key] = float(record.expense)
+        income_dict = defaultdict(Decimal)
+        expenses_dict = defaultdict(Decimal)
+        for month, category_name, category_type, total in monthly_totals:
+            if category_type == 'Income':
+                income_dict[month] += total
+            elif category_type == 'Expense':
+                expenses_dict[month] += total
 
         # Create a sorted list of months
         all_months = sorted(set(list(income_dict.keys()) + list(expenses_dict.keys())))
 
         # Prepare data for the chart
-        income_data = [income_dict.get(month, 0) for month in all_months]
-        expense_data = [expenses_dict.get(month, 0) for month in all_months]
+        income_data = [float(income_dict.get(month, 0)) for month in all_months]
+        expense_data = [float(expenses_dict.get(month, 0)) for month in all_months]
 
         # Calculate Trend Indicators
         def calculate_trend(current, previous):
@@ -245,7 +348,6 @@ def dashboard():
             income_trend = 0
             expense_trend = 0
 
-        logger.debug(f"Income trend: {income_trend}%, Expense trend: {expense_trend}%")
 
         return render_template(
             'dashboard.html',
@@ -256,7 +358,6 @@ def dashboard():
             categories=categories,
             amounts=amounts,
             recent_transactions=recent_transactions,
-            calendar_events=calendar_events,
             upcoming_transactions=upcoming_transactions,
             today=today,
             all_months=all_months,
@@ -266,14 +367,15 @@ def dashboard():
             expense_trend=expense_trend
         )
     except Exception as e:
-        logger.error(f"Error in dashboard route: {e}")
-        logger.debug(traceback.format_exc())
+        logger.error("Error in dashboard route: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while loading the dashboard.', 'danger')
         return render_template('500.html'), 500
     
 # Transaction Routes
 
-@app.route('/transactions', methods=['GET'])
+@bp.route('/transactions', methods=['GET'])
+@conditional_get(CATEGORIES)
 def view_transactions():
     logger.debug("Accessed view_transactions route.")
     try:
@@ -285,59 +387,107 @@ def view_transactions():
             datetime.strptime(month_str, '%Y-%m')
             year, month_num = map(int, month_str.split('-'))
         except ValueError:
-            logger.warning(f"Invalid month format received: {month_str}")
+            logger.warning("Invalid month format received: %s", month_str)
             flash('Invalid month format. Please use YYYY-MM.', 'warning')
             year, month_num = datetime.now().year, datetime.now().month
 
-        # Fetch transactions for the specified month
-        transactions = Transaction.query.filter(
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month_num
-        ).join(Category).all()
-
-        transaction_data = []
-        for transaction in transactions:
-            transaction_data.append({
-                'id': transaction.id,
-                'date': transaction.date,
-                'category': transaction.category.name,
-                'description': transaction.description,
-                'amount': transaction.amount,
-                'type': transaction.type,
-                'recurring': transaction.recurring
-            })
-
-        logger.debug(f"Fetched {len(transaction_data)} transactions for {month_str}.")
+        # Rows are fetched page by page from /api/transactions as the user scrolls
+        first_day, next_month_first_day = month_bounds(year, month_num)
 
         # Calculate previous and next month
-        month = datetime.strptime(month_str, '%Y-%m')
-        previous_month = (month.replace(day=1) - timedelta(days=1)).replace(day=1).strftime('%Y-%m')
-        next_month = (month.replace(day=1) + timedelta(days=31)).replace(day=1).strftime('%Y-%m')
+        month_str = first_day.strftime('%Y-%m')
+        previous_month = (first_day - timedelta(days=1)).replace(day=1).strftime('%Y-%m')
+        next_month = next_month_first_day.strftime('%Y-%m')
 
         # Instantiate the TransactionForm to pass to the template
         form = TransactionForm()
 
         return render_template(
             'view_transactions.html',
-            transactions=transaction_data,
             month=month_str,
             previous_month=previous_month,
             next_month=next_month,
             form=form
         )
     except Exception as e:
-        logger.error(f"Error in view_transactions route: {e}")
-        logger.debug(traceback.format_exc())
+        logger.error("Error in view_transactions route: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while fetching transactions.', 'danger')
         return render_template('500.html'), 500
 
 
-@app.route('/add_transaction', methods=['POST'])
+def parse_transaction_filters(args):
+    """Transaction list filters from query parameters; raises ValueError or ArithmeticError if malformed."""
+    filters = {}
+    month_str = args.get('month')
+    if month_str:
+        filters['start_date'], filters['end_date'] = month_bounds(*map(int, month_str.split('-')))
+    if args.get('start_date'):
+        filters['start_date'] = datetime.strptime(args['start_date'], '%Y-%m-%d').date()
+    if args.get('end_date'):
+        # end_date is inclusive for callers; the query uses a half-open range
+        filters['end_date'] = datetime.strptime(args['end_date'], '%Y-%m-%d').date() + timedelta(days=1)
+    filters['category_id'] = args.get('category', type=int)
+    filters['type'] = args.get('type')
+    if args.get('min_amount'):
+        filters['min_amount'] = Decimal(args['min_amount'])
+    if args.get('max_amount'):
+        filters['max_amount'] = Decimal(args['max_amount'])
+    return filters
+
+@bp.route('/api/transactions', methods=['GET'])
+@conditional_get(TRANSACTIONS, CATEGORIES, html=False)
+def api_transactions():
+    logger.debug("Accessed api_transactions route.")
+    try:
+        filters = parse_transaction_filters(request.args)
+        limit = min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+
+        transactions, next_cursor = transaction_page(filters, cursor=cursor, limit=max(limit, 1))
+    except (ValueError, ArithmeticError) as ve:
+        logger.warning("Invalid transactions API request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    return jsonify({
+        'transactions': [serialize_transaction(txn) for txn in transactions],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/transactions/search', methods=['GET'])
+@conditional_get(TRANSACTIONS, CATEGORIES, html=False)
+def api_search_transactions():
+    logger.debug("Accessed api_search_transactions route.")
+    user_query = request.args.get('q', '').strip()
+    if not user_query:
+        return jsonify({'error': 'Missing search query.'}), 400
+    try:
+        filters = parse_transaction_filters(request.args)
+        page = request.args.get('page', 1, type=int)
+        limit = min(max(request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int), 1), MAX_SEARCH_PAGE_SIZE)
+        if not 1 <= page <= MAX_SEARCH_PAGE:
+            raise ValueError(f'page must be 1-{MAX_SEARCH_PAGE}')
+
+        transactions, has_more, ranked = search_transactions(user_query, filters, page=page, limit=limit)
+    except (ValueError, ArithmeticError) as ve:
+        logger.warning("Invalid transaction search request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    return jsonify({
+        'query': user_query,
+        'order': 'relevance' if ranked else 'newest',
+        'transactions': [serialize_transaction(txn) for txn in transactions],
+        'page': page,
+        'next_page': page + 1 if has_more and page < MAX_SEARCH_PAGE else None
+    })
+
+
+@bp.route('/add_transaction', methods=['POST'])
 def add_transaction():
     logger.debug("Accessed add_transaction route.")
     form = TransactionForm()
     if form.validate_on_submit():
-        try:
+        def save():
             transaction = Transaction(
                 date=form.date.data,
                 category_id=form.category.data,
@@ -346,77 +496,133 @@ def add_transaction():
                 type=form.type.data,  # Using 'type' as field name
                 recurring=form.recurring.data
             )
+            if form.recurring.data:
+                # Schedule future occurrences; the background job posts them when due
+                transaction.recurring_transaction = RecurringTransaction(
+                    frequency=FrequencyEnum(form.frequency.data),
+                    start_date=form.next_date.data,
+                    next_date=form.next_date.data,
+                    description=form.description.data,
+                    amount=form.amount.data,
+                    type=form.type.data,
+                    category_id=form.category.data
+                )
             db.session.add(transaction)
-            db.session.commit()
-            logger.info(f"Added new transaction: {transaction}")
+            db.session.flush()
+            return repr(transaction)
+
+        try:
+            transaction = writes.run(save)
+            logger.info("Added new transaction: %s", transaction)
             flash('Transaction added successfully!', 'success')
-            return redirect(url_for('view_transactions'))
+            return redirect(url_for('main.view_transactions'))
         except Exception as e:
-            logger.error(f"Error adding transaction: {e}")
-            logger.debug(traceback.format_exc())
-            db.session.rollback()
+            logger.error("Error adding transaction: %s", e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred while adding the transaction.', 'danger')
     else:
         logger.debug("Form validation failed for adding transaction.")
         # Log the form errors for debugging
         for field, errors in form.errors.items():
             for error in errors:
-                logger.debug(f"Error in {getattr(form, field).label.text}: {error}")
+                logger.debug("Error in %s: %s", getattr(form, field).label.text, error)
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('view_transactions'))
+    return redirect(url_for('main.view_transactions'))
 
 
-@app.route('/edit_transaction/<int:transaction_id>', methods=['POST'])
+@bp.route('/edit_transaction/<int:transaction_id>', methods=['POST'])
 def edit_transaction(transaction_id):
-    logger.debug(f"Accessed edit_transaction route for transaction ID: {transaction_id}")
-    transaction = Transaction.query.get_or_404(transaction_id)
+    logger.debug("Accessed edit_transaction route for transaction ID: %s", transaction_id)
+    Transaction.query.get_or_404(transaction_id)
     form = TransactionForm()
     if form.validate_on_submit():
-        try:
+        def save():
             # Update transaction fields
+            transaction = db.get_or_404(Transaction, transaction_id)
             transaction.date = form.date.data
             transaction.category_id = form.category.data
             transaction.description = form.description.data
             transaction.amount = form.amount.data
             transaction.type = form.type.data
             transaction.recurring = form.recurring.data
+            db.session.flush()
+            return repr(transaction)
 
-            db.session.commit()
-            logger.info(f"Updated transaction ID {transaction_id}: {transaction}")
+        try:
+            transaction = writes.run(save)
+            logger.info("Updated transaction ID %s: %s", transaction_id, transaction)
             flash('Transaction updated successfully!', 'success')
-            return redirect(url_for('view_transactions'))
+            return redirect(url_for('main.view_transactions'))
         except Exception as e:
-            logger.error(f"Error editing transaction ID {transaction_id}: {e}")
-            logger.debug(traceback.format_exc())
-            db.session.rollback()
+            logger.error("Error editing transaction ID %s: %s", transaction_id, e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred while editing the transaction.', 'danger')
     else:
-        logger.debug(f"Form validation failed for editing transaction ID {transaction_id}.")
+        logger.debug("Form validation failed for editing transaction ID %s.", transaction_id)
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('view_transactions'))
+    return redirect(url_for('main.view_transactions'))
 
 
-@app.route('/delete_transaction/<int:transaction_id>', methods=['POST'])
+@bp.route('/delete_transaction/<int:transaction_id>', methods=['POST'])
 def delete_transaction(transaction_id):
-    logger.debug(f"Accessed delete_transaction route for transaction ID: {transaction_id}")
-    transaction = Transaction.query.get_or_404(transaction_id)
-    try:
+    logger.debug("Accessed delete_transaction route for transaction ID: %s", transaction_id)
+    Transaction.query.get_or_404(transaction_id)
+
+    def delete():
+        transaction = db.get_or_404(Transaction, transaction_id)
         db.session.delete(transaction)
-        db.session.commit()
-        logger.info(f"Deleted transaction ID {transaction_id}: {transaction}")
+        return repr(transaction)
+
+    try:
+        transaction = writes.run(delete)
+        logger.info("Deleted transaction ID %s: %s", transaction_id, transaction)
         flash('Transaction deleted successfully!', 'success')
     except Exception as e:
-        logger.error(f"Error deleting transaction ID {transaction_id}: {e}")
-        logger.debug(traceback.format_exc())
-        db.session.rollback()
+        logger.error("Error deleting transaction ID %s: %s", transaction_id, e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while deleting the transaction.', 'danger')
-    return redirect(url_for('view_transactions'))
+    return redirect(url_for('main.view_transactions'))
+
+def run_batch(kind, apply):
+    """Run a batch mutation through the write coordinator and answer with its outcome as JSON."""
+    try:
+        outcome = writes.run(apply)
+    except WriteRejected as e:
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError as e:
+        logger.warning("Batch %s update rejected by a constraint: %s", kind, e.orig)
+        return jsonify({'error': 'The change conflicts with existing rows; nothing was changed.'}), 409
+    except Exception as e:
+        logger.error("Error applying batch %s change: %s", kind, e)
+        logger.debug("Traceback:", exc_info=True)
+        return jsonify({'error': f'An error occurred while applying the batch {kind} change.'}), 500
+    logger.info("Batch %s %s: %s of %s selected rows changed.",
+                kind, outcome['operation'], outcome['applied'], outcome['matched'])
+    return jsonify(outcome)
+
+@bp.route('/api/transactions/batch', methods=['POST'])
+def api_batch_transactions():
+    logger.debug("Accessed api_batch_transactions route.")
+    payload = request.get_json(silent=True)
+    try:
+        operation, ids, raw_filters = parse_selection(payload)
+        changes = transaction_changes(operation, payload)
+        filters = None
+        if raw_filters is not None:
+            # Same filters as /api/transactions, given as a JSON object
+            filters = parse_transaction_filters(MultiDict({key: str(value) for key, value in raw_filters.items()}))
+    except (ValueError, ArithmeticError) as ve:
+        logger.warning("Invalid batch transactions request: %s", ve)
+        return jsonify({'error': f'Invalid batch request: {ve}'}), 400
+
+    return run_batch('transaction', lambda: batch_transactions(operation, changes, ids=ids, filters=filters))
 
 # Budget Routes
 
-@app.route('/budgets', methods=['GET'])
+@bp.route('/budgets', methods=['GET'])
+@conditional_get(BUDGETS, TRANSACTIONS, CATEGORIES)
 def view_budgets():
     logger.debug("Accessed view_budgets route.")
     try:
@@ -427,42 +633,44 @@ def view_budgets():
             datetime.strptime(month_str, '%Y-%m')
             month = month_str
         except ValueError:
-            logger.warning(f"Invalid month format received: {month_str}")
+            logger.warning("Invalid month format received: %s", month_str)
             flash('Invalid month format. Please use YYYY-MM.', 'warning')
             month = datetime.now().strftime('%Y-%m')
 
-        # Optimize queries to prevent N+1 problem
-        budgets = Budget.query.filter_by(month=month).join(Category).all()
-        budget_ids = [budget.id for budget in budgets]
-        category_ids = [budget.category_id for budget in budgets]
-
-        # Aggregate spent amounts per category
-        spent_data = db.session.query(
-            Transaction.category_id,
-            db.func.sum(Transaction.amount).label('spent')
-        ).filter(
-            Transaction.category_id.in_(category_ids),
-            extract('year', Transaction.date) == int(month.split('-')[0]),
-            extract('month', Transaction.date) == int(month.split('-')[1])
-        ).group_by(Transaction.category_id).all()
-
-        spent_dict = {data.category_id: data.spent for data in spent_data}
-
-        budget_data = []
-        for budget in budgets:
-            spent = spent_dict.get(budget.category_id, Decimal(0))  # Ensure spent is Decimal
-            remaining = Decimal(budget.amount) - spent  # Convert budget.amount to Decimal
-            percentage = (spent / Decimal(budget.amount) * 100) if budget.amount > 0 else 0  # Ensure consistent types
-            budget_data.append({
-                'id': budget.id,
-                'category': budget.category.name,
-                'budget': Decimal(budget.amount),  # Ensure budget is Decimal
-                'spent': spent,
-                'remaining': remaining,
-                'percentage': percentage,
-                'month': budget.month
-            })
-        logger.debug(f"Fetched {len(budget_data)} budgets for month {month}.")
+        def load_budget_data():
+            # Category names come from the registry, so no join or per-budget lazy load
+            budgets = Budget.query.filter_by(month=month).all()
+            categories = category_registry.get()
+            # Spending per category comes from the rollup, one lookup per budget
+            spent_dict = spent_by_category(month)
+            alert_levels = {}
+            for alert in budget_alerts_for_month(month):
+                alert_levels.setdefault(alert.budget_id, alert.threshold)
+
+            budget_data = []
+            for budget in budgets:
+                # Money columns and their SUMs already come back as Decimal
+                spent = spent_dict.get(budget.category_id, ZERO)
+                remaining = budget.amount - spent
+                percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
+                budget_data.append({
+                    'id': budget.id,
+                    'category': categories.name(budget.category_id),
+                    'budget': budget.amount,
+                    'spent': spent,
+                    'remaining': remaining,
+                    'percentage': percentage,
+                    'alert': alert_levels.get(budget.id),
+                    'month': budget.month
+                })
+            return budget_data
+
+        # Cached per month until a budget or transaction in that month changes
+        budget_data = cache.get_or_compute(
+            ('budgets', month),
+            load_budget_data,
+            tags={month_tag(month), budget_month_tag(month)}
+        )
 
         # Instantiate the BudgetForm to pass to the template
         form = BudgetForm()
@@ -474,26 +682,37 @@ def view_budgets():
             form=form  # Pass the form to the template
         )
     except Exception as e:
-        logger.error(f"Error in view_budgets route: {e}")
-        logger.debug(traceback.format_exc())
+        logger.error("Error in view_budgets route: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while fetching budgets.', 'danger')
         return render_template('500.html'), 500
 
-@app.route('/add_budget', methods=['POST'])
+@bp.route('/api/budgets/alerts', methods=['GET'])
+@conditional_get(BUDGETS, TRANSACTIONS, CATEGORIES, per_day=True, html=False)
+def api_budget_alerts():
+    logger.debug("Accessed api_budget_alerts route.")
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        logger.warning("Invalid month format received: %s", month)
+        return jsonify({'error': 'Invalid month format. Please use YYYY-MM.'}), 400
+    return jsonify({'month': month, 'alerts': [serialize_alert(alert) for alert in budget_alerts_for_month(month)]})
+
+@bp.route('/add_budget', methods=['POST'])
 def add_budget():
     logger.debug("Accessed add_budget route.")
     form = BudgetForm()
     if form.validate_on_submit():
-        try:
+        def save():
             # Check if a budget for the category and month already exists
             existing_budget = Budget.query.filter_by(
                 category_id=form.category.data,
                 month=form.month.data
             ).first()
             if existing_budget:
-                logger.warning(f"Attempted to add duplicate budget for category ID {form.category.data} and month {form.month.data}.")
-                form.category.errors.append('A budget for this category and month already exists.')
-                return redirect(url_for('view_budgets'))
+                logger.warning("Attempted to add duplicate budget for category ID %s and month %s.", form.category.data, form.month.data)
+                raise WriteRejected('A budget for this category and month already exists.')
 
             budget = Budget(
                 category_id=form.category.data,
@@ -501,307 +720,441 @@ def add_budget():
                 month=form.month.data
             )
             db.session.add(budget)
-            db.session.commit()
-            logger.info(f"Added new budget: {budget}")
+            db.session.flush()
+            return repr(budget)
+
+        try:
+            budget = writes.run(save)
+            logger.info("Added new budget: %s", budget)
             flash('Budget added successfully!', 'success')
-            return redirect(url_for('view_budgets'))
+            return redirect(url_for('main.view_budgets'))
+        except WriteRejected as e:
+            flash(str(e), 'warning')
         except Exception as e:
-            logger.error(f"Error adding budget: {e}")
-            logger.debug(traceback.format_exc())
-            db.session.rollback()
+            logger.error("Error adding budget: %s", e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred while adding the budget.', 'danger')
     else:
         logger.debug("Form validation failed for adding budget.")
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('view_budgets'))
+    return redirect(url_for('main.view_budgets'))
 
-@app.route('/edit_budget/<int:budget_id>', methods=['POST'])
+@bp.route('/edit_budget/<int:budget_id>', methods=['POST'])
 def edit_budget(budget_id):
-    logger.debug(f"Accessed edit_budget route for budget ID: {budget_id}")
-    budget = Budget.query.get_or_404(budget_id)
+    logger.debug("Accessed edit_budget route for budget ID: %s", budget_id)
+    Budget.query.get_or_404(budget_id)
     form = BudgetForm()
     if form.validate_on_submit():
-        try:
+        def save():
+            budget = db.get_or_404(Budget, budget_id)
             # Check for duplicate budget
             existing_budget = Budget.query.filter_by(
                 category_id=form.category.data,
                 month=form.month.data
             ).first()
             if existing_budget and existing_budget.id != budget.id:
-                logger.warning(f"Attempted to edit budget ID {budget_id} to duplicate category ID {form.category.data} and month {form.month.data}.")
-                form.category.errors.append('Another budget for this category and month already exists.')
-                return redirect(url_for('view_budgets'))
+                logger.warning("Attempted to edit budget ID %s to duplicate category ID %s and month %s.", budget_id, form.category.data, form.month.data)
+                raise WriteRejected('Another budget for this category and month already exists.')
 
             budget.category_id = form.category.data
             budget.amount = form.amount.data
             budget.month = form.month.data
-            db.session.commit()
-            logger.info(f"Updated budget ID {budget_id}: {budget}")
+            db.session.flush()
+            return repr(budget)
+
+        try:
+            budget = writes.run(save)
+            logger.info("Updated budget ID %s: %s", budget_id, budget)
             flash('Budget updated successfully!', 'success')
-            return redirect(url_for('view_budgets'))
+            return redirect(url_for('main.view_budgets'))
+        except WriteRejected as e:
+            flash(str(e), 'warning')
         except Exception as e:
-            logger.error(f"Error editing budget ID {budget_id}: {e}")
-            logger.debug(traceback.format_exc())
-            db.session.rollback()
+            logger.error("Error editing budget ID %s: %s", budget_id, e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred while editing the budget.', 'danger')
     else:
-        logger.debug(f"Form validation failed for editing budget ID {budget_id}.")
+        logger.debug("Form validation failed for editing budget ID %s.", budget_id)
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"Error in {getattr(form, field).label.text}: {error}", 'danger')
-    return redirect(url_for('view_budgets'))
+    return redirect(url_for('main.view_budgets'))
 
-@app.route('/delete_budget/<int:budget_id>', methods=['POST'])
+@bp.route('/delete_budget/<int:budget_id>', methods=['POST'])
 def delete_budget(budget_id):
-    logger.debug(f"Accessed delete_budget route for budget ID: {budget_id}")
-    budget = Budget.query.get_or_404(budget_id)
-    try:
+    logger.debug("Accessed delete_budget route for budget ID: %s", budget_id)
+    Budget.query.get_or_404(budget_id)
+
+    def delete():
+        budget = db.get_or_404(Budget, budget_id)
         db.session.delete(budget)
-        db.session.commit()
-        logger.info(f"Deleted budget ID {budget_id}: {budget}")
+        return repr(budget)
+
+    try:
+        budget = writes.run(delete)
+        logger.info("Deleted budget ID %s: %s", budget_id, budget)
         flash('Budget deleted successfully!', 'success')
     except Exception as e:
-        logger.error(f"Error deleting budget ID {budget_id}: {e}")
-        logger.debug(traceback.format_exc())
-        db.session.rollback()
+        logger.error("Error deleting budget ID %s: %s", budget_id, e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while deleting the budget.', 'danger')
-    return redirect(url_for('view_budgets'))
+    return redirect(url_for('main.view_budgets'))
+
+@bp.route('/api/budgets/batch', methods=['POST'])
+def api_batch_budgets():
+    logger.debug("Accessed api_batch_budgets route.")
+    payload = request.get_json(silent=True)
+    try:
+        operation, ids, raw_filters = parse_selection(payload)
+        changes = budget_changes(operation, payload)
+        filters = budget_filters(raw_filters) if raw_filters is not None else None
+    except (ValueError, ArithmeticError) as ve:
+        logger.warning("Invalid batch budgets request: %s", ve)
+        return jsonify({'error': f'Invalid batch request: {ve}'}), 400
+
+    return run_batch('budget', lambda: batch_budgets(operation, changes, ids=ids, filters=filters))
 
 # Savings Routes
 
-@app.route('/savings', methods=['GET', 'POST'])
+@bp.route('/savings', methods=['GET', 'POST'])
+@conditional_get(SAVINGS)
 def savings():
     form = SavingsForm()
     
     if form.validate_on_submit():
         account_name = form.account_name.data
         balance = form.balance.data
-        new_account = SavingsAccount(account_name=account_name, balance=balance)
-        db.session.add(new_account)
-        db.session.commit()
+        writes.run(lambda: db.session.add(SavingsAccount(account_name=account_name, balance=balance)))
         flash('Savings account added successfully!', 'success')
-        return redirect(url_for('savings'))
+        return redirect(url_for('main.savings'))
 
     savings_accounts = SavingsAccount.query.all()
     return render_template('savings.html', form=form, savings_accounts=savings_accounts)
 
-@app.route('/savings/edit/<int:account_id>', methods=['GET', 'POST'])
+@bp.route('/savings/edit/<int:account_id>', methods=['GET', 'POST'])
 def edit_savings(account_id):
     account = SavingsAccount.query.get_or_404(account_id)
     form = SavingsForm(obj=account)  # Pre-fill the form with the existing account data
     
     if form.validate_on_submit():
-        account.account_name = form.account_name.data
-        account.balance = form.balance.data
-        db.session.commit()
+        def save():
+            account = db.get_or_404(SavingsAccount, account_id)
+            account.account_name = form.account_name.data
+            account.balance = form.balance.data
+
+        writes.run(save)
         flash('Savings account updated successfully!', 'success')
-        return redirect(url_for('savings'))
+        return redirect(url_for('main.savings'))
 
     return render_template('edit_savings.html', form=form, account=account)
 
-@app.route('/savings/delete/<int:account_id>', methods=['POST'])
+@bp.route('/savings/delete/<int:account_id>', methods=['POST'])
 def delete_savings(account_id):
-    account = SavingsAccount.query.get_or_404(account_id)
-    db.session.delete(account)
-    db.session.commit()
+    SavingsAccount.query.get_or_404(account_id)
+    writes.run(lambda: db.session.delete(db.get_or_404(SavingsAccount, account_id)))
     flash('Savings account deleted successfully!', 'success')
-    return redirect(url_for('savings'))
+    return redirect(url_for('main.savings'))
 
 # Reports Routes
 
-@app.route('/reports', methods=['GET', 'POST'])
+@bp.route('/reports', methods=['GET', 'POST'])
 def reports():
     logger.debug("Accessed reports route.")
     if request.method == 'POST':
         report_type = request.form.get('report_type')
         start_date = request.form.get('start_date')
         end_date = request.form.get('end_date')
-        logger.debug(f"Report request: type={report_type}, start_date={start_date}, end_date={end_date}")
+        logger.debug("Report request: type=%s, start_date=%s, end_date=%s", report_type, start_date, end_date)
         if not report_type or not start_date or not end_date:
             logger.warning("Incomplete report request received.")
             flash('Please select report type and date range.', 'warning')
-            return redirect(url_for('reports'))
+            return redirect(url_for('main.reports'))
         try:
             start_date_parsed = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date_parsed = datetime.strptime(end_date, '%Y-%m-%d').date()
-            logger.debug(f"Parsed dates: start_date={start_date_parsed}, end_date={end_date_parsed}")
+            logger.debug("Parsed dates: start_date=%s, end_date=%s", start_date_parsed, end_date_parsed)
         except ValueError as ve:
-            logger.warning(f"Invalid date format in report request: {ve}")
+            logger.warning("Invalid date format in report request: %s", ve)
             flash('Invalid date format. Please use YYYY-MM-DD.', 'danger')
-            return redirect(url_for('reports'))
+            return redirect(url_for('main.reports'))
+        if report_type not in REPORT_TYPES:
+            logger.warning("Unknown report type requested: %s", report_type)
+            flash('Please select a valid report type.', 'warning')
+            return redirect(url_for('main.reports'))
         try:
-            transactions = Transaction.query.filter(
-                Transaction.date >= start_date_parsed,
-                Transaction.date <= end_date_parsed
-            ).all()
-            logger.debug(f"Fetched {len(transactions)} transactions for the report.")
-
-            # Generate summaries based on report_type
-            # (Monthly, Quarterly, Yearly)
-            # Placeholder for actual report generation logic
-            # ...
+            # Period x category x type totals, aggregated in SQL
+            # Cached until a transaction in one of the covered months changes
+            report, totals = cache.get_or_compute(
+                ('report', report_type, start_date_parsed, end_date_parsed),
+                lambda: build_report(report_type, start_date_parsed, end_date_parsed),
+                tags=range_month_tags(start_date_parsed, end_date_parsed)
+            )
 
             return render_template(
                 'reports.html',
-                transactions=transactions,
+                report=report,
+                totals=totals,
                 report_type=report_type,
                 start_date=start_date_parsed,
                 end_date=end_date_parsed
             )
         except Exception as e:
-            logger.error(f"Error generating report: {e}")
-            logger.debug(traceback.format_exc())
+            logger.error("Error generating report: %s", e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred while generating the report.', 'danger')
-            return redirect(url_for('reports'))
+            return redirect(url_for('main.reports'))
     return render_template('reports.html')
 
+@bp.route('/api/analytics/category_trends', methods=['GET'])
+@conditional_get(TRANSACTIONS, CATEGORIES, per_day=True, html=False)
+def api_category_trends():
+    logger.debug("Accessed api_category_trends route.")
+    try:
+        end_month = request.args.get('end')
+        end = datetime.strptime(end_month, '%Y-%m').date() if end_month else datetime.now().date()
+        months = request.args.get('months', DEFAULT_TREND_MONTHS, type=int)
+        window = request.args.get('window', DEFAULT_MOVING_AVERAGE, type=int)
+        if not 1 <= months <= MAX_TREND_MONTHS or not 1 <= window <= months:
+            raise ValueError(f'months must be 1-{MAX_TREND_MONTHS} and window 1-months')
+    except ValueError as ve:
+        logger.warning("Invalid category trends request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+    category_type = request.args.get('type') or None
+    if category_type not in (None, 'Income', 'Expense'):
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    # Series for all categories come from one rollup query and are computed together;
+    # cached until a transaction in one of the covered months changes
+    first_day = end.replace(day=1) - relativedelta(months=months - 1)
+    trends = cache.get_or_compute(
+        ('category_trends', month_key(end), months, window, category_type),
+        lambda: category_trends(end, months, window, category_type),
+        tags=range_month_tags(first_day, end)
+    )
+    return jsonify(trends)
+
+def parse_window(args, default_days, days_back=0):
+    """
+    The half-open [start, end) window of a calendar, forecast or balance request.
+    FullCalendar sends ISO datetimes with an offset; only the date part is used.
+    """
+    start_str = args.get('start')
+    if start_str:
+        start = datetime.fromisoformat(start_str[:10]).date()
+    else:
+        start = datetime.now().date() - timedelta(days=days_back)
+    end_str = args.get('end')
+    end = datetime.fromisoformat(end_str[:10]).date() if end_str else start + timedelta(days=default_days)
+    if not 0 < (end - start).days <= MAX_EXPANSION_DAYS:
+        raise ValueError(f'end must be after start and at most {MAX_EXPANSION_DAYS} days later')
+    return start, end
+
+@bp.route('/api/calendar/events', methods=['GET'])
+@conditional_get(RECURRING, CATEGORIES, per_day=True, html=False)
+def api_calendar_events():
+    logger.debug("Accessed api_calendar_events route.")
+    try:
+        start, end = parse_window(request.args, default_days=42)
+    except ValueError as ve:
+        logger.warning("Invalid calendar events request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    # FullCalendar expects a bare array of events for the visible range
+    return jsonify(calendar_events(start, end))
+
+@bp.route('/api/recurring/forecast', methods=['GET'])
+@conditional_get(RECURRING, CATEGORIES, per_day=True, html=False)
+def api_recurring_forecast():
+    logger.debug("Accessed api_recurring_forecast route.")
+    try:
+        start, end = parse_window(request.args, default_days=365)
+    except ValueError as ve:
+        logger.warning("Invalid recurring forecast request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    forecast = recurring_forecast(start, end)
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'months': [{
+            'month': month,
+            'income': float(totals['income']),
+            'expense': float(totals['expense']),
+            'net': float(totals['income'] - totals['expense'])
+        } for month, totals in sorted(forecast.items())]
+    })
+
+@bp.route('/api/analytics/balance', methods=['GET'])
+@conditional_get(TRANSACTIONS, CATEGORIES, RECURRING, per_day=True, html=False)
+def api_balance_series():
+    logger.debug("Accessed api_balance_series route.")
+    interval = request.args.get('interval', 'day')
+    try:
+        if interval == 'day':
+            start, end = parse_window(request.args, default_days=180, days_back=90)
+        elif interval == 'month':
+            start, end = parse_window(request.args, default_days=1095, days_back=730)
+        else:
+            raise ValueError('interval must be day or month')
+    except ValueError as ve:
+        logger.warning("Invalid balance series request: %s", ve)
+        return jsonify({'error': 'Invalid query parameters.'}), 400
+
+    # Balances depend on every earlier month, so rather than month tags the entry
+    # is keyed by the data versions it was computed from; any write makes a new key
+    today = datetime.now().date()
+    versions, _ = current_versions([TRANSACTIONS, CATEGORIES, RECURRING])
+    series = cache.get_or_compute(
+        ('balance_series', interval, start, end, today, tuple(sorted(versions.items()))),
+        lambda: balance_series(start, end, interval, today)
+    )
+    return jsonify(series)
+
 
 # -------------------- Data Export Routes -------------------- #
 
-@app.route('/export/<string:export_format>')
+@bp.route('/export/<string:export_format>')
+@conditional_get(TRANSACTIONS, CATEGORIES, html=False)
 def export_data(export_format):
-    logger.debug(f"Accessed data export route with format: {export_format}.")
+    logger.debug("Accessed data export route with format: %s.", export_format)
+    export_format = export_format.lower()
+    if export_format not in STREAMERS:
+        logger.warning("Unsupported export format: %s", export_format)
+        flash('Unsupported export format!', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    # Optional filters: ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&category=<name>
     try:
-        transactions = Transaction.query.all()
-        if export_format.lower() == 'csv':
-            logger.debug("Exporting data as CSV.")
-            si = StringIO()
-            cw = csv.writer(si)
-            cw.writerow(['ID', 'Amount', 'Date', 'Description', 'Category'])
-            for txn in transactions:
-                cw.writerow([txn.id, txn.amount, txn.date.strftime('%Y-%m-%d'), txn.description, txn.category.name])
-            output = make_response(si.getvalue())
-            output.headers["Content-Disposition"] = "attachment; filename=transactions.csv"
-            output.headers["Content-type"] = "text/csv"
-            logger.info("CSV data exported successfully.")
-            return output
-        elif export_format.lower() == 'json':
-            logger.debug("Exporting data as JSON.")
-            data = []
-            for txn in transactions:
-                data.append({
-                    'id': txn.id,
-                    'amount': txn.amount,
-                    'date': txn.date.strftime('%Y-%m-%d'),
-                    'description': txn.description,
-                    'category': txn.category.name
-                })
-            output = make_response(json.dumps(data, indent=4))
-            output.headers["Content-Disposition"] = "attachment; filename=transactions.json"
-            output.headers["Content-type"] = "application/json"
-            logger.info("JSON data exported successfully.")
-            return output
-        else:
-            logger.warning(f"Unsupported export format: {export_format}")
-            flash('Unsupported export format!', 'danger')
-            return redirect(url_for('dashboard'))
-    
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError as ve:
+        logger.warning("Invalid date format in export request: %s", ve)
+        flash('Invalid date format. Please use YYYY-MM-DD.', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    category_id = None
+    category_name = request.args.get('category')
+    if category_name:
+        category = category_registry.get().by_name.get(category_name)
+        if not category:
+            logger.warning("Unknown category in export request: %s", category_name)
+            flash('Unknown category for export.', 'danger')
+            return redirect(url_for('main.dashboard'))
+        category_id = category.id
+
+    try:
+        query = export_query(start_date, end_date, category_id)
+        mimetype, filename = EXPORT_FORMATS[export_format]
+        # Rows are written out as they are read, so memory stays flat regardless of ledger size
+        output = Response(stream_with_context(STREAMERS[export_format](query)), mimetype=mimetype)
+        output.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        logger.info("Streaming %s export.", export_format.upper())
+        return output
     except Exception as e:
-        logger.error(f"Error exporting data: {e}")
-        logger.debug(traceback.format_exc())
+        logger.error("Error exporting data: %s", e)
+        logger.debug("Traceback:", exc_info=True)
         flash('An error occurred while exporting data.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
 # -------------------- Data Import Route -------------------- #
 
-@app.route('/import', methods=['GET', 'POST'])
+@bp.route('/import', methods=['GET', 'POST'])
 def import_data():
     logger.debug("Accessed data import route.")
     form = ImportForm()
     if form.validate_on_submit():
         file = form.file.data
         filename = file.filename
-        logger.info(f"Starting data import from file: {filename}")
-        success_count = 0
-        failure_count = 0
-        failure_details = []
-        
+        logger.info("Starting data import from file: %s", filename)
+        file_format = filename.rsplit('.', 1)[-1].upper()
+
+        if not filename.endswith(('.csv', '.json', '.ndjson')):
+            logger.warning("Unsupported file format: %s", filename)
+            flash('Unsupported file format!', 'danger')
+            return redirect(url_for('main.import_data'))
+
+        if current_app.config['IMPORT_BACKGROUND']:
+            # Hand the upload to the worker pool and let the browser poll for progress
+            job = import_jobs.submit(file)
+            if job is None:
+                logger.warning("Import rejected: too many imports in progress.")
+                flash('Too many imports are in progress. Please try again shortly.', 'warning')
+                return redirect(url_for('main.import_data'))
+            return redirect(url_for('main.import_job', job_id=job.id))
+
         try:
-            if filename.endswith('.csv'):
-                logger.debug("Importing CSV file.")
-                stream = StringIO(file.stream.read().decode("UTF8"), newline=None)
-                csv_input = csv.reader(stream)
-                header = next(csv_input, None)
-                
-                for row in csv_input:
-                    try:
-                        amount = float(row[1])
-                        date_str = row[2]
-                        description = row[3]
-                        category_name = row[4]
-                        category = Category.query.filter_by(name=category_name).first()
-                        if not category:
-                            raise ValueError('Category not found')
-                        transaction = Transaction(
-                            amount=amount,
-                            date=datetime.strptime(date_str, '%Y-%m-%d').date(),
-                            description=description,
-                            category_id=category.id
-                        )
-                        db.session.add(transaction)
-                        success_count += 1
-                    except Exception as row_error:
-                        failure_count += 1
-                        failure_details.append({'row': row, 'error': str(row_error)})
-                        logger.error(f"Error processing row: {row} - {row_error}")
-                
-                db.session.commit()
-                logger.info(f"CSV data import completed: {success_count} successes, {failure_count} failures.")
-                flash(f'CSV data imported: {success_count} successes, {failure_count} failures.', 'success')
-                return render_template('import_summary.html', success_count=success_count, failure_count=failure_count, failure_details=failure_details)
-            
-            elif filename.endswith('.json'):
-                logger.debug("Importing JSON file.")
-                try:
-                    data = json.load(file.stream)
-                except json.JSONDecodeError:
-                    logger.error("Invalid JSON file format.")
-                    flash('Invalid JSON file.', 'danger')
-                    return redirect(url_for('import_data'))
-                
-                for item in data:
-                    try:
-                        amount = float(item['amount'])
-                        date_str = item['date']
-                        description = item.get('description', '')
-                        category_name = item['category']
-                        category = Category.query.filter_by(name=category_name).first()
-                        if not category:
-                            raise ValueError('Category not found')
-                        transaction = Transaction(
-                            amount=amount,
-                            date=datetime.strptime(date_str, '%Y-%m-%d').date(),
-                            description=description,
-                            category_id=category.id
-                        )
-                        db.session.add(transaction)
-                        success_count += 1
-                    except Exception as item_error:
-                        failure_count += 1
-                        failure_details.append({'item': item, 'error': str(item_error)})
-                        logger.error(f"Error processing item: {item} - {item_error}")
-                
-                db.session.commit()
-                logger.info(f"JSON data import completed: {success_count} successes, {failure_count} failures.")
-                flash(f'JSON data imported: {success_count} successes, {failure_count} failures.', 'success')
-                return render_template('import_summary.html', success_count=success_count, failure_count=failure_count, failure_details=failure_details)
-            
-            else:
-                logger.warning(f"Unsupported file format: {filename}")
-                flash('Unsupported file format!', 'danger')
-                return redirect(url_for('import_data'))
-        
+            # Parses the upload as a stream and inserts in committed chunks
+            result = import_file(file.stream, filename, chunk_size=current_app.config['IMPORT_CHUNK_SIZE'])
+        except json.JSONDecodeError:
+            db.session.rollback()
+            logger.error("Invalid JSON file format.")
+            flash('Invalid JSON file.', 'danger')
+            return redirect(url_for('main.import_data'))
         except Exception as e:
-            logger.error(f"Error during data import: {e}")
-            logger.debug(traceback.format_exc())
+            db.session.rollback()
+            logger.error("Error during data import: %s", e)
+            logger.debug("Traceback:", exc_info=True)
             flash('An error occurred during data import.', 'danger')
-            return redirect(url_for('import_data'))
-    
+            return redirect(url_for('main.import_data'))
+
+        logger.info(
+            "%s data import completed: %s successes, %s failures in %.2fs.",
+            file_format, result.success_count, result.failure_count, result.elapsed
+        )
+        flash(f'{file_format} data imported: {result.success_count} successes, {result.failure_count} failures.', 'success')
+        return render_template(
+            'import_summary.html',
+            success_count=result.success_count,
+            failure_count=result.failure_count,
+            failure_details=result.failure_details
+        )
+
     return render_template('import_data.html', form=form)
 
-if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000, debug=True)
+@bp.route('/import/jobs/<string:job_id>')
+def import_job(job_id):
+    logger.debug("Accessed import job page for job ID: %s", job_id)
+    job = import_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status == 'failed':
+        flash(f'Import of {job.filename} failed: {job.error}', 'danger')
+        return redirect(url_for('main.import_data'))
+    if job.status == 'completed':
+        result = job.result
+        flash(f'{job.filename} imported: {result.success_count} successes, {result.failure_count} failures.', 'success')
+        return render_template(
+            'import_summary.html',
+            success_count=result.success_count,
+            failure_count=result.failure_count,
+            failure_details=result.failure_details
+        )
+    return render_template('import_progress.html', job=job.to_dict())
+
+@bp.route('/import/jobs/<string:job_id>/status')
+def import_job_status(job_id):
+    job = import_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found.'}), 404
+    return jsonify(job.to_dict())
 
+@bp.route('/metrics')
+def prometheus_metrics():
+    return metrics.response()
 
+@bp.route('/api/cache/stats')
+def cache_stats():
+    return jsonify(cache.stats())
+
+if __name__ == "__main__":
+    # Single-process development server: initialise the database and run the scheduler here
+    app = create_app()
+    with app.app_context():
+        init_database()
+    if not app.config['RUN_SCHEDULER']:
+        start_scheduler(app)
+    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,212 @@
+# benchmarks/run.py
+"""
+Benchmark the hot routes against a synthetic ledger through the Flask test client.
+
+    python -m benchmarks.run --transactions 100000
+    python -m benchmarks.run --transactions 100000 --save-baseline
+    python -m benchmarks.run --transactions 100000 --compare
+
+Reports p50/p95 latency, queries per request and the peak Python memory one
+request allocates per route, plus the peak RSS of the whole run. The
+database is a throwaway SQLite file, never the application's own.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# A route regresses when its p95 grows by more than this fraction of the baseline
+DEFAULT_TOLERANCE = 0.25
+IMPORT_ROWS = 1000
+
+
+def peak_rss_kb():
+    # Process-wide high-water mark; ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def import_payload(rows, day):
+    lines = ['ID,Amount,Date,Description,Category']
+    for i in range(rows):
+        lines.append(f"{i},{(i % 90) + 5}.50,{day.isoformat()},Benchmark row {i},Food")
+    return '\n'.join(lines).encode('utf-8')
+
+
+def build_routes(today, first_day):
+    """(name, method, path, form data factory) for every benchmarked route."""
+    report_range = {'start_date': first_day.isoformat(), 'end_date': today.isoformat()}
+    month = today.strftime('%Y-%m')
+    return [
+        ('dashboard', 'GET', '/', None),
+        ('view_transactions', 'GET', f'/transactions?month={month}', None),
+        ('api_transactions', 'GET', f'/api/transactions?month={month}', None),
+        ('view_budgets', 'GET', f'/budgets?month={month}', None),
+        ('reports_monthly', 'POST', '/reports', lambda: dict(report_type='Monthly', **report_range)),
+        ('reports_yearly', 'POST', '/reports', lambda: dict(report_type='Yearly', **report_range)),
+        ('export_csv', 'GET', '/export/csv', None),
+        ('export_json', 'GET', '/export/json', None),
+    ]
+
+
+def run(args, workdir):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    os.environ['RUN_SCHEDULER'] = '0'
+    from app import create_app, init_database
+    from utils.cache import cache
+    from utils.synthetic import generate_ledger
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from io import BytesIO
+
+    app = create_app()
+    for name in ('app', 'utils.metrics'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    app.config.update(WTF_CSRF_ENABLED=False, IMPORT_BACKGROUND=False)
+
+    with app.app_context():
+        init_database()
+        started = time.perf_counter()
+        summary = generate_ledger(transactions=args.transactions, years=args.years, seed=args.seed)
+        print(f"Generated {summary['transactions']} transactions in {time.perf_counter() - started:.1f}s")
+
+    queries = [0]
+
+    # Every engine, so reads on the read-only pool are counted too
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def count_query(*_):
+        queries[0] += 1
+
+    client = app.test_client()
+    routes = build_routes(summary['end'], summary['start'])
+    # Imports add rows, so they run last and fewer times
+    routes.append(('import_csv', 'POST', '/import', lambda: {
+        'file': (BytesIO(import_payload(IMPORT_ROWS, summary['end'])), 'bench.csv')
+    }))
+
+    def request(name, method, path, data):
+        if args.cold:
+            cache.for_app(app).clear()
+        if method == 'GET':
+            response = client.get(path)
+        else:
+            response = client.post(path, data=data(), content_type='multipart/form-data')
+        response.get_data()  # Drain streamed bodies
+        if response.status_code >= 400:
+            raise SystemExit(f"{name}: {method} {path} returned {response.status_code}")
+
+    results = {}
+    for name, method, path, data in routes:
+        repeat = args.import_repeat if name == 'import_csv' else args.repeat
+        latencies = []
+        query_counts = []
+        for _ in range(repeat):
+            queries[0] = 0
+            started = time.perf_counter()
+            request(name, method, path, data)
+            latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(queries[0])
+        # One more request, untimed since tracing slows it down, for this route's own allocation peak
+        tracemalloc.start()
+        request(name, method, path, data)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'queries': max(query_counts),
+            'peak_memory_kb': peak_memory // 1024
+        }
+    return {
+        'transactions': summary['transactions'],
+        'repeat': args.repeat,
+        'cold': args.cold,
+        'peak_rss_kb': peak_rss_kb(),
+        'routes': results
+    }
+
+
+def print_results(report, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """Print a results table; return the names of routes that regressed against the baseline."""
+    regressions = []
+    header = f"{'route':<20}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak mem MB':>13}"
+    if baseline:
+        header += f"{'base p95':>10}{'change':>9}"
+    print(header)
+    for name, stats in report['routes'].items():
+        line = (f"{name:<20}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                f"{stats['queries']:>9}{stats['peak_memory_kb'] / 1024:>13.1f}")
+        base = (baseline or {}).get('routes', {}).get(name)
+        if base:
+            change = (stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+            flag = ''
+            if change > tolerance or stats['queries'] > base['queries']:
+                regressions.append(name)
+                flag = ' !'
+            line += f"{base['p95_ms']:>10.2f}{change:>+9.0%}{flag}"
+        print(line)
+    print(f"Peak RSS of the whole run: {report['peak_rss_kb'] / 1024:.1f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per route.')
+    parser.add_argument('--import-repeat', type=int, default=3, help='Requests for the import route.')
+    parser.add_argument('--cold', action='store_true', help='Clear the result cache before every request.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file.')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline.')
+    parser.add_argument('--compare', action='store_true', help='Fail if a route regressed against the baseline.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--output', help='Also write the results as JSON to this file.')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='pennypilot-bench-')
+    try:
+        report = run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            parser.error(f'No baseline at {args.baseline}; run with --save-baseline first.')
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('transactions') != report['transactions']:
+            print(f"Warning: baseline was recorded with {baseline.get('transactions')} transactions.")
+
+    regressions = print_results(report, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"Regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,49 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
     # Example configuration; adjust according to your setup
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///finance.db'  # Ensure this path is correct
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///finance.db'  # Ensure this path is correct
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Start the recurring-transaction scheduler in this process (see create_app)
+    RUN_SCHEDULER = os.environ.get('RUN_SCHEDULER', '0') == '1'
+    # With leader election, every RUN_SCHEDULER process competes for a lease row and
+    # only the holder runs jobs; a peer takes over once the holder stops renewing
+    SCHEDULER_LEADER_ELECTION = os.environ.get('SCHEDULER_LEADER_ELECTION', '1') == '1'
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', 60))
+    SCHEDULER_HEARTBEAT_SECONDS = int(os.environ.get('SCHEDULER_HEARTBEAT_SECONDS', 15))
+    # SQLite storage profile: WAL journaling, a read-only pool for GET requests
+    # and a single-connection pool for writes
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') == '1'
+    SQLITE_READ_POOL_SIZE = int(os.environ.get('SQLITE_READ_POOL_SIZE', 8))
+    SQLITE_WRITE_TIMEOUT = int(os.environ.get('SQLITE_WRITE_TIMEOUT', 30))  # seconds to wait for a pooled connection
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    # Send form mutations to a single writer thread that group-commits whatever
+    # arrives within the batch window in one transaction
+    WRITE_COORDINATOR = os.environ.get('WRITE_COORDINATOR', '1') == '1'
+    WRITE_BATCH_WINDOW_MS = int(os.environ.get('WRITE_BATCH_WINDOW_MS', 5))
+    WRITE_BATCH_MAX = int(os.environ.get('WRITE_BATCH_MAX', 100))
+    # Percent-of-budget levels that raise a budget alert when spending crosses them
+    BUDGET_ALERT_THRESHOLDS = tuple(
+        int(level) for level in os.environ.get('BUDGET_ALERT_THRESHOLDS', '80,100').split(',') if level.strip()
+    )
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-very-secret-key'
+    # Logging: APP_ENV picks the default level (development=DEBUG, testing=WARNING,
+    # production=INFO); LOG_LEVEL overrides it. A LOG_DEBUG_SAMPLE_RATE above 0
+    # emits DEBUG lines for that fraction of requests only.
+    APP_ENV = os.environ.get('APP_ENV', 'production')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL')
+    LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+    LOG_FILE_LEVEL = os.environ.get('LOG_FILE_LEVEL', 'INFO')
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.0))
+    # Rows inserted and committed per batch when importing CSV/JSON files
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+    # Run uploads as background jobs on a bounded worker pool
+    IMPORT_BACKGROUND = os.environ.get('IMPORT_BACKGROUND', '1') == '1'
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+    IMPORT_MAX_PENDING = int(os.environ.get('IMPORT_MAX_PENDING', 8))
+    # In-process cache for dashboard, budget and report aggregates
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 300))
+    # Log SQL statements slower than this many milliseconds; 0 disables the slow-query log
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 250))
@@ -1,20 +1,38 @@
 # forms/forms.py
 from flask_wtf import FlaskForm
 from wtforms import (
-    StringField, FloatField, SubmitField, SelectField, DateField,
+    StringField, SubmitField, SelectField, DateField,
     FileField, BooleanField, DecimalField
 )
 from wtforms.validators import (
     DataRequired, Length, NumberRange, Optional, ValidationError
 )
-from models.models import Category
+from utils.categories import category_registry
+from utils.money import parse_money
 from datetime import datetime
+from decimal import Decimal
 from werkzeug.utils import secure_filename
 
+class MoneyField(DecimalField):
+    """Amount field that yields a Decimal rounded to the cent, as the Money columns store it."""
+
+    def __init__(self, label=None, validators=None, places=2, **kwargs):
+        super(MoneyField, self).__init__(label, validators, places=places, **kwargs)
+
+    def process_formdata(self, valuelist):
+        if valuelist and valuelist[0].strip():
+            try:
+                self.data = parse_money(valuelist[0].strip())
+            except ValueError:
+                self.data = None
+                raise ValueError(self.gettext('Not a valid amount.'))
+        else:
+            self.data = None
+
 class TransactionForm(FlaskForm):
-    amount = FloatField(
+    amount = MoneyField(
         'Amount', 
-        validators=[DataRequired(), NumberRange(min=0.01, message="Amount must be greater than zero.")]
+        validators=[DataRequired(), NumberRange(min=Decimal('0.01'), message="Amount must be greater than zero.")]
     )
     date = DateField(
         'Date', 
@@ -55,10 +73,8 @@ class TransactionForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super(TransactionForm, self).__init__(*args, **kwargs)
-        # Populate category choices dynamically from the database
-        self.category.choices = [
-            (c.id, c.name) for c in Category.query.order_by('name')
-        ]
+        # Category choices come from the shared registry, not a query per form
+        self.category.choices = category_registry.get().choices
 
     def validate_next_date(self, field):
         if self.recurring.data and field.data:
@@ -83,7 +99,7 @@ class TransactionForm(FlaskForm):
 
 class BudgetForm(FlaskForm):
     category = SelectField('Category', coerce=int, validators=[DataRequired()])
-    amount = FloatField(
+    amount = MoneyField(
         'Budget Amount',
         validators=[DataRequired(), NumberRange(min=0.0, message="Amount must be non-negative.")]
     )
@@ -96,19 +112,17 @@ class BudgetForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(BudgetForm, self).__init__(*args, **kwargs)
         # Only allow categories of type 'Expense'
-        self.category.choices = [
-            (c.id, c.name) for c in Category.query.filter_by(type='Expense').order_by('name')
-        ]
+        self.category.choices = category_registry.get().expense_choices
 
 class ImportForm(FlaskForm):
-    file = FileField('Import Data File (CSV or JSON)', validators=[DataRequired()])
+    file = FileField('Import Data File (CSV, JSON or NDJSON)', validators=[DataRequired()])
     submit = SubmitField('Import')
 
     def validate_file(self, field):
         if field.data:
             filename = secure_filename(field.data.filename)
-            if not (filename.endswith('.csv') or filename.endswith('.json')):
-                raise ValidationError('Unsupported file format! Please upload a CSV or JSON file.')
+            if not filename.endswith(('.csv', '.json', '.ndjson')):
+                raise ValidationError('Unsupported file format! Please upload a CSV, JSON or NDJSON file.')
             
 
 class SavingsForm(FlaskForm):
@@ -116,7 +130,7 @@ class SavingsForm(FlaskForm):
         'Account Name',
         validators=[DataRequired(), Length(max=100, message="Account name cannot exceed 100 characters.")]
     )
-    balance = DecimalField(
+    balance = MoneyField(
         'Initial Balance',
         validators=[DataRequired(), NumberRange(min=0.0, message="Balance must be non-negative.")]
     )
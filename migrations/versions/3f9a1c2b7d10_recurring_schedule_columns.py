@@ -0,0 +1,60 @@
+"""recurring schedule columns and occurrence key
+
+Revision ID: 3f9a1c2b7d10
+Revises: 
+Create Date: 2026-10-18 17:40:12.417203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _unique_constraints(table):
+    inspector = sa.inspect(op.get_bind())
+    names = {c['name'] for c in inspector.get_unique_constraints(table)}
+    names |= {i['name'] for i in inspector.get_indexes(table) if i.get('unique')}
+    return names
+
+
+def upgrade():
+    # db.create_all() already builds these on fresh databases, so only add what is missing
+    existing = _columns('recurring_transaction')
+    with op.batch_alter_table('recurring_transaction', schema=None) as batch_op:
+        if 'start_date' not in existing:
+            batch_op.add_column(sa.Column('start_date', sa.Date(), nullable=True))
+        if 'type' not in existing:
+            batch_op.add_column(sa.Column('type', sa.String(length=50), nullable=True))
+        if 'category_id' not in existing:
+            batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                'fk_recurring_transaction_category', 'category',
+                ['category_id'], ['id'], ondelete='CASCADE'
+            )
+
+    if 'uq_transaction_recurring_occurrence' not in _unique_constraints('transaction'):
+        with op.batch_alter_table('transaction', schema=None) as batch_op:
+            batch_op.create_unique_constraint(
+                'uq_transaction_recurring_occurrence', ['recurring_transaction_id', 'date']
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_transaction_recurring_occurrence', type_='unique')
+
+    with op.batch_alter_table('recurring_transaction', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_recurring_transaction_category', type_='foreignkey')
+        batch_op.drop_column('category_id')
+        batch_op.drop_column('type')
+        batch_op.drop_column('start_date')
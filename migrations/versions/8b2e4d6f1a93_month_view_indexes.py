@@ -0,0 +1,51 @@
+"""month view indexes and unique budget per category and month
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f9a1c2b7d10
+Create Date: 2026-10-18 18:02:51.088430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f9a1c2b7d10'
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table):
+    inspector = sa.inspect(op.get_bind())
+    names = {i['name'] for i in inspector.get_indexes(table)}
+    names |= {c['name'] for c in inspector.get_unique_constraints(table)}
+    return names
+
+
+def upgrade():
+    existing = _index_names('transaction')
+    if 'ix_transaction_date' not in existing:
+        op.create_index('ix_transaction_date', 'transaction', ['date'])
+    if 'ix_transaction_category_date' not in existing:
+        op.create_index('ix_transaction_category_date', 'transaction', ['category_id', 'date'])
+
+    existing = _index_names('budget')
+    if 'uq_budget_category_month' not in existing:
+        # Keep the most recently created budget where duplicates slipped in
+        op.execute(
+            'DELETE FROM budget WHERE id NOT IN '
+            '(SELECT MAX(id) FROM budget GROUP BY category_id, month)'
+        )
+        with op.batch_alter_table('budget', schema=None) as batch_op:
+            batch_op.create_unique_constraint('uq_budget_category_month', ['category_id', 'month'])
+    if 'ix_budget_month' not in existing:
+        op.create_index('ix_budget_month', 'budget', ['month'])
+
+
+def downgrade():
+    op.drop_index('ix_budget_month', table_name='budget')
+    with op.batch_alter_table('budget', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_budget_category_month', type_='unique')
+    op.drop_index('ix_transaction_category_date', table_name='transaction')
+    op.drop_index('ix_transaction_date', table_name='transaction')
@@ -0,0 +1,127 @@
+"""store money columns as integer cents
+
+Revision ID: c5e1f7a9d342
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-18 18:31:07.552019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e1f7a9d342'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs holding money amounts
+MONEY_COLUMNS = [
+    ('transaction', 'amount'),
+    ('budget', 'amount'),
+    ('recurring_transaction', 'amount'),
+    ('savings_accounts', 'balance'),
+    ('monthly_rollup', 'total'),
+]
+
+# Rows converted per committed statement during the backfill
+BACKFILL_CHUNK_ROWS = 5000
+
+
+def _column_types(table):
+    """Column name -> type for `table`, or None if the table does not exist."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {info['name']: info['type'] for info in inspector.get_columns(table)}
+
+
+def _column_type(table, column):
+    return (_column_types(table) or {}).get(column)
+
+
+def _to_cents(column, prefix=''):
+    return f'CAST(ROUND({prefix}"{column}" * 100) AS INTEGER)'
+
+
+def _backfill(table, column, target):
+    """
+    Copy `column` into `target` as cents, one rowid range per autocommitted
+    statement, so the write lock is only ever held for one chunk and the app
+    keeps serving (and writing) while a large ledger converts.
+    """
+    bind = op.get_bind()
+    last = bind.execute(sa.text(f'SELECT MAX(rowid) FROM "{table}"')).scalar() or 0
+    update = sa.text(
+        f'UPDATE "{table}" SET "{target}" = {_to_cents(column)} '
+        'WHERE rowid > :low AND rowid <= :high'
+    )
+    for low in range(0, last, BACKFILL_CHUNK_ROWS):
+        bind.execute(update, {'low': low, 'high': low + BACKFILL_CHUNK_ROWS})
+
+
+def _rebuild_rollup():
+    """
+    Recompute monthly_rollup from the converted transaction amounts. A rollup
+    filled before the conversion (e.g. by `flask init-db` on the old ledger)
+    holds decimal totals that would read as cents; the budget alerts derived
+    from it are dropped too, and `flask rebuild-rollup` records them again.
+    """
+    op.execute('DELETE FROM monthly_rollup')
+    op.execute(
+        'INSERT INTO monthly_rollup (month, category_id, type, total, count) '
+        "SELECT strftime('%Y-%m', date), category_id, type, SUM(amount), COUNT(id) "
+        'FROM "transaction" GROUP BY 1, 2, 3'
+    )
+    if sa.inspect(op.get_bind()).has_table('budget_alert'):
+        op.execute('DELETE FROM budget_alert')
+
+
+def upgrade():
+    converted = set()
+    for table, column in MONEY_COLUMNS:
+        columns = _column_types(table)
+        if columns is None:
+            continue  # Tables db.create_all() has not made yet get the Money type when it does
+        if isinstance(columns.get(column), sa.Integer):
+            continue  # Created by db.create_all() with the Money type already
+        target = f'{column}_cents'
+        # A conversion interrupted part way may have left the column and triggers behind
+        if target not in columns:
+            op.add_column(table, sa.Column(target, sa.BigInteger(), nullable=True))
+
+        # Rows written while the backfill runs are kept in step by triggers
+        op.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{table}_{target}_insert" AFTER INSERT ON "{table}" BEGIN '
+            f'UPDATE "{table}" SET "{target}" = {_to_cents(column, "NEW.")} WHERE rowid = NEW.rowid; END'
+        )
+        op.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{table}_{target}_update" AFTER UPDATE OF "{column}" ON "{table}" BEGIN '
+            f'UPDATE "{table}" SET "{target}" = {_to_cents(column, "NEW.")} WHERE rowid = NEW.rowid; END'
+        )
+        with op.get_context().autocommit_block():
+            _backfill(table, column, target)
+
+        # Swap the columns in one short transaction
+        op.execute(f'DROP TRIGGER "{table}_{target}_insert"')
+        op.execute(f'DROP TRIGGER "{table}_{target}_update"')
+        op.execute(f'UPDATE "{table}" SET "{target}" = {_to_cents(column)} WHERE "{target}" IS NULL')
+        op.execute(f'ALTER TABLE "{table}" DROP COLUMN "{column}"')
+        op.execute(f'ALTER TABLE "{table}" RENAME COLUMN "{target}" TO "{column}"')
+        # The NOT NULL constraint would need a full table rebuild on SQLite; the
+        # model declares it, and every row was filled above
+        converted.add(table)
+
+    if 'transaction' in converted and _column_types('monthly_rollup') is not None:
+        _rebuild_rollup()
+
+
+def downgrade():
+    for table, column in MONEY_COLUMNS:
+        if not isinstance(_column_type(table, column), sa.Integer):
+            continue
+        target = f'{column}_units'
+        op.add_column(table, sa.Column(target, sa.Float(), nullable=True))
+        op.execute(f'UPDATE "{table}" SET "{target}" = "{column}" / 100.0')
+        op.execute(f'ALTER TABLE "{table}" DROP COLUMN "{column}"')
+        op.execute(f'ALTER TABLE "{table}" RENAME COLUMN "{target}" TO "{column}"')
@@ -0,0 +1,45 @@
+"""full-text search index over transaction descriptions
+
+Revision ID: e9b4c6d2f187
+Revises: c5e1f7a9d342
+Create Date: 2026-10-18 19:12:44.210385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4c6d2f187'
+down_revision = 'c5e1f7a9d342'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5(
+        description,
+        content='transaction',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS transaction_fts_insert AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO transaction_fts(rowid, description) VALUES (new.id, new.description);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS transaction_fts_delete AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS transaction_fts_update AFTER UPDATE OF description ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO transaction_fts(rowid, description) VALUES (new.id, new.description);
+    END""")
+    # Index the existing ledger; `flask rebuild-search` does the same on demand
+    op.execute("INSERT INTO transaction_fts(transaction_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS transaction_fts_update')
+    op.execute('DROP TRIGGER IF EXISTS transaction_fts_delete')
+    op.execute('DROP TRIGGER IF EXISTS transaction_fts_insert')
+    op.execute('DROP TABLE IF EXISTS transaction_fts')
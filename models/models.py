@@ -3,10 +3,14 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Column, Integer, String, Float, DateTime
 from datetime import date, datetime
 from enum import Enum
+from utils.storage import RoutingSession
+from utils.money import Money
 
-db = SQLAlchemy()
+# Reads made while serving GET requests go to a read-only pool; see utils/storage.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class FrequencyEnum(Enum):
+    DAILY = 'Daily'
     WEEKLY = 'Weekly'
     MONTHLY = 'Monthly'
     YEARLY = 'Yearly'    
@@ -36,8 +40,18 @@ class RecurringTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     frequency = db.Column(db.Enum(FrequencyEnum), nullable=False)
     next_date = db.Column(db.Date, nullable=False, default=date.today)  # Next occurrence date
+    start_date = db.Column(db.Date, nullable=True)  # Schedule anchor; occurrences are start_date + n * frequency
     description = db.Column(db.String(100), nullable=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)  # Integer cents in the database; see utils/money.py
+    type = db.Column(db.String(50), nullable=True)  # 'Income' or 'Expense'; defaults to the category type
+
+    # Category the posted transactions are filed under
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey('category.id', ondelete='CASCADE', name='fk_recurring_transaction_category'),
+        nullable=True
+    )
+    category = db.relationship('Category', lazy=True)
 
     # Relationship to Transaction
     transactions = db.relationship('Transaction', backref='recurring_transaction', lazy=True, cascade="all, delete-orphan")
@@ -51,7 +65,7 @@ class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     description = db.Column(db.String(255), nullable=False)
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    amount = db.Column(Money, nullable=False)
     type = db.Column(db.String(50), nullable=False)  # 'Income' or 'Expense'
     recurring = db.Column(db.Boolean, default=False)
 
@@ -67,6 +81,14 @@ class Transaction(db.Model):
         nullable=True
     )
 
+    __table_args__ = (
+        # One posting per schedule per day, so concurrent recurrence runs cannot double-post
+        db.UniqueConstraint('recurring_transaction_id', 'date', name='uq_transaction_recurring_occurrence'),
+        # Month views and per-category aggregates filter on date ranges
+        db.Index('ix_transaction_date', 'date'),
+        db.Index('ix_transaction_category_date', 'category_id', 'date'),
+    )
+
     def __repr__(self):
         return f'<Transaction {self.id} - {self.amount} on {self.date}>'
 
@@ -74,14 +96,40 @@ class Transaction(db.Model):
 class Budget(db.Model):
     __tablename__ = 'budget'
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     month = db.Column(db.String(7), nullable=False)  # Format: 'YYYY-MM'
 
     # Foreign key to Category
     category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete='CASCADE'), nullable=False)
 
+    alerts = db.relationship('BudgetAlert', backref='budget', lazy=True, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # One budget per category per month; also serves (category_id, month) lookups
+        db.UniqueConstraint('category_id', 'month', name='uq_budget_category_month'),
+        db.Index('ix_budget_month', 'month'),
+    )
+
     def __repr__(self):
         return f'<Budget {self.amount} for {self.category.name} in {self.month}>'
+
+
+class BudgetAlert(db.Model):
+    __tablename__ = 'budget_alert'
+
+    # One row per threshold a budget has crossed; removed again if spending falls back below it
+    id = db.Column(db.Integer, primary_key=True)
+    budget_id = db.Column(db.Integer, db.ForeignKey('budget.id', ondelete='CASCADE'), nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)  # Percent of the budgeted amount
+    spent = db.Column(Money, nullable=False)  # Spending when the threshold was crossed
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('budget_id', 'threshold', name='uq_budget_alert_threshold'),
+    )
+
+    def __repr__(self):
+        return f'<BudgetAlert {self.threshold}% of budget {self.budget_id}>'
     
 
 class SavingsAccount(db.Model):
@@ -89,7 +137,71 @@ class SavingsAccount(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     account_name = db.Column(db.String(100), nullable=False)
-    balance = db.Column(db.Float, default=0.0)  # Default balance is 0.0
+    balance = db.Column(Money, default=0)
 
     def __repr__(self):
         return f'<SavingsAccount {self.account_name}, Balance: {self.balance}>'
+
+
+class MonthlyRollup(db.Model):
+    __tablename__ = 'monthly_rollup'
+
+    # Composite key: one row per (month, category, type)
+    month = db.Column(db.String(7), primary_key=True)  # Format: 'YYYY-MM'
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey('category.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    type = db.Column(db.String(50), primary_key=True)  # 'Income' or 'Expense'
+    total = db.Column(Money, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MonthlyRollup {self.month} {self.category_id} {self.type}: {self.total}>'
+
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    # One monotonically increasing counter per logical table, bumped on every write
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
+
+
+class SchedulerLease(db.Model):
+    __tablename__ = 'scheduler_lease'
+
+    # One row per leader-elected role; whoever holds an unexpired lease runs its jobs
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(120), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    renewed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name}: {self.holder} until {self.expires_at}>'
+
+
+class ImportJobRecord(db.Model):
+    __tablename__ = 'import_job'
+
+    # Progress of a background import, saved after every chunk so any worker can answer a poll
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    error = db.Column(db.Text, nullable=True)
+    parsed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    elapsed = db.Column(db.Float, nullable=False, default=0.0)  # Seconds, as of the last save
+    failure_details = db.Column(db.Text, nullable=True)  # JSON list, written when the job finishes
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ImportJobRecord {self.id} {self.filename}: {self.status}>'
@@ -0,0 +1,243 @@
+# utils/analytics.py
+from models.models import db, MonthlyRollup, Transaction
+from utils.categories import category_registry
+from utils.money import cents, to_cents
+from utils.rollup import month_key
+from utils.recurrence import scheduled_occurrences, rule_type
+from dateutil.relativedelta import relativedelta
+from datetime import date, timedelta
+from sqlalchemy import case, func
+
+DEFAULT_TREND_MONTHS = 24
+MAX_TREND_MONTHS = 600
+DEFAULT_MOVING_AVERAGE = 3
+
+
+def month_range(start, end):
+    """'YYYY-MM' keys from the month of `start` through the month of `end`."""
+    months = []
+    day = start.replace(day=1)
+    while day <= end:
+        months.append(f"{day.year:04d}-{day.month:02d}")
+        day += relativedelta(months=1)
+    return months
+
+
+def category_month_matrix(months, category_type=None):
+    """
+    Load every category's monthly totals for `months` in one rollup query.
+
+    Returns (categories, matrix) where categories is a list of (id, name, type)
+    and matrix is an int64 array of cents shaped (len(categories), len(months)),
+    zero where a category had no transactions that month.
+    """
+    import numpy as np  # Kept out of module scope so app startup does not pay for it
+
+    snapshot = category_registry.get()
+    categories = snapshot.of_type(category_type) if category_type else snapshot.all
+    matrix = np.zeros((len(categories), len(months)), dtype=np.int64)
+    if not categories or not months:
+        return categories, matrix
+
+    rows = db.session.query(
+        MonthlyRollup.month,
+        MonthlyRollup.category_id,
+        cents(func.sum(MonthlyRollup.total))
+    ).filter(
+        MonthlyRollup.month >= months[0],
+        MonthlyRollup.month <= months[-1]
+    ).group_by(MonthlyRollup.month, MonthlyRollup.category_id).all()
+
+    row_of = {category_id: i for i, (category_id, _, _) in enumerate(categories)}
+    col_of = {month: j for j, month in enumerate(months)}
+    cells = [(row_of[category_id], col_of[month], total)
+             for month, category_id, total in rows if category_id in row_of]
+    if cells:
+        r, c, v = (np.array(column) for column in zip(*cells))
+        matrix[r, c] = v
+    return categories, matrix
+
+
+def _ratio(numerator, denominator):
+    import numpy as np
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def trend_statistics(matrix, window=DEFAULT_MOVING_AVERAGE):
+    """
+    Moving averages, month-over-month and year-over-year changes and a
+    least-squares slope for every row of a (categories x months) matrix at once.
+    Values are in the matrix's units; undefined cells are NaN.
+    """
+    import numpy as np
+
+    values = matrix.astype(np.float64)
+    n_rows, n_months = values.shape
+
+    moving_average = np.full(values.shape, np.nan)
+    if 0 < window <= n_months:
+        sums = np.cumsum(np.pad(values, ((0, 0), (1, 0))), axis=1)
+        moving_average[:, window - 1:] = (sums[:, window:] - sums[:, :-window]) / window
+
+    mom_change = np.full(values.shape, np.nan)
+    mom_change[:, 1:] = values[:, 1:] - values[:, :-1]
+    mom_pct = np.full(values.shape, np.nan)
+    mom_pct[:, 1:] = _ratio(mom_change[:, 1:], values[:, :-1]) * 100
+
+    yoy_change = np.full(values.shape, np.nan)
+    yoy_pct = np.full(values.shape, np.nan)
+    if n_months > 12:
+        yoy_change[:, 12:] = values[:, 12:] - values[:, :-12]
+        yoy_pct[:, 12:] = _ratio(yoy_change[:, 12:], values[:, :-12]) * 100
+
+    # Ordinary least squares against the month index, solved for all rows in one pass
+    if n_months > 1:
+        t = np.arange(n_months, dtype=np.float64)
+        t -= t.mean()
+        slope = (values - values.mean(axis=1, keepdims=True)) @ t / (t @ t)
+    else:
+        slope = np.zeros(n_rows)
+
+    return {
+        'moving_average': moving_average,
+        'mom_change': mom_change,
+        'mom_pct': mom_pct,
+        'yoy_change': yoy_change,
+        'yoy_pct': yoy_pct,
+        'slope': slope
+    }
+
+
+def _series(array, scale=1.0):
+    import numpy as np
+    rounded = np.round(array / scale, 2)
+    return [None if np.isnan(value) else value for value in rounded.tolist()]
+
+
+def category_trends(end=None, months=DEFAULT_TREND_MONTHS, window=DEFAULT_MOVING_AVERAGE, category_type=None):
+    """
+    Per-category monthly series and trend statistics for the `months` months
+    ending with the month of `end`, ready for JSON. Amounts are in currency
+    units; percentages are plain numbers; undefined values are None.
+    """
+    end = end or date.today()
+    month_keys = month_range(end.replace(day=1) - relativedelta(months=months - 1), end)
+    categories, matrix = category_month_matrix(month_keys, category_type)
+    stats = trend_statistics(matrix, window)
+
+    slopes = _series(stats['slope'], 100)
+    result = []
+    for i, (category_id, name, type_) in enumerate(categories):
+        result.append({
+            'id': category_id,
+            'name': name,
+            'type': type_,
+            'totals': _series(matrix[i], 100),
+            'moving_average': _series(stats['moving_average'][i], 100),
+            'mom_change': _series(stats['mom_change'][i], 100),
+            'mom_pct': _series(stats['mom_pct'][i]),
+            'yoy_change': _series(stats['yoy_change'][i], 100),
+            'yoy_pct': _series(stats['yoy_pct'][i]),
+            'slope_per_month': slopes[i]
+        })
+    return {'months': month_keys, 'window': window, 'categories': result}
+
+
+def _signed(amount, txn_type):
+    return case((txn_type == 'Income', cents(amount)), else_=-cents(amount))
+
+
+def monthly_balances(first_month, last_month):
+    """
+    (month, net, balance) rows in integer cents for the months of the rollup
+    between the 'YYYY-MM' bounds, balance being the running total of every
+    month up to and including that one. The running sum is a window function
+    over the whole rollup, evaluated before the month filter, so balances
+    account for all earlier history in one pass.
+    """
+    net = func.sum(_signed(MonthlyRollup.total, MonthlyRollup.type))
+    running = db.session.query(
+        MonthlyRollup.month.label('month'),
+        net.label('net'),
+        func.sum(net).over(order_by=MonthlyRollup.month).label('balance')
+    ).group_by(MonthlyRollup.month).subquery()
+    return db.session.query(
+        running.c.month, cents(running.c.net), cents(running.c.balance)
+    ).filter(running.c.month >= first_month, running.c.month <= last_month).order_by(running.c.month).all()
+
+
+def opening_balance(day):
+    """Balance in integer cents before any transaction dated `day` or later."""
+    before_month = db.session.query(cents(func.sum(_signed(MonthlyRollup.total, MonthlyRollup.type))))\
+        .filter(MonthlyRollup.month < month_key(day)).scalar() or 0
+    within_month = db.session.query(cents(func.sum(_signed(Transaction.amount, Transaction.type))))\
+        .filter(Transaction.date >= day.replace(day=1), Transaction.date < day).scalar() or 0
+    return before_month + within_month
+
+
+def _projected_nets(start, end, today, slot_of, size):
+    """Signed cents of the recurring occurrences still to come in [max(start, today), end), per slot."""
+    import numpy as np
+
+    projected = np.zeros(size, dtype=np.int64)
+    for rule, dates in scheduled_occurrences(max(start, today), end):
+        txn_type = rule_type(rule)
+        if txn_type not in ('Income', 'Expense'):
+            continue
+        amount = to_cents(rule.amount) if txn_type == 'Income' else -to_cents(rule.amount)
+        for occurrence in dates:
+            projected[slot_of(occurrence)] += amount
+    return projected
+
+
+def balance_series(start, end, interval='day', today=None):
+    """
+    Running balance over [start, end) per day or per month, ready for JSON.
+
+    `balance` follows the posted transactions (future-dated ones included);
+    `projected_balance` adds the recurring occurrences still to be posted from
+    `today` onwards, so the two diverge only in the future. Amounts are in
+    currency units.
+    """
+    import numpy as np
+
+    today = today or date.today()
+    if interval == 'month':
+        periods = month_range(start, end - relativedelta(days=1))
+        col_of = {month: j for j, month in enumerate(periods)}
+        net = np.zeros(len(periods), dtype=np.int64)
+        balance = np.zeros(len(periods), dtype=np.int64)
+        rows = {month: (month_net, month_balance)
+                for month, month_net, month_balance in monthly_balances(periods[0], periods[-1])}
+        if rows:
+            first_net, first_balance = rows[min(rows)]
+            running = first_balance - first_net
+        else:
+            running = opening_balance(start.replace(day=1))
+        for j, month in enumerate(periods):
+            # Months missing from the rollup carry the previous balance forward
+            if month in rows:
+                net[j], running = rows[month]
+            balance[j] = running
+        projected = _projected_nets(start, end, today, lambda day: col_of[month_key(day)], len(periods))
+    else:
+        days = (end - start).days
+        periods = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+        net = np.zeros(days, dtype=np.int64)
+        rows = db.session.query(Transaction.date, cents(func.sum(_signed(Transaction.amount, Transaction.type))))\
+            .filter(Transaction.date >= start, Transaction.date < end).group_by(Transaction.date).all()
+        for day, day_net in rows:
+            net[(day - start).days] = day_net
+        balance = opening_balance(start) + np.cumsum(net)
+        projected = _projected_nets(start, end, today, lambda day: (day - start).days, days)
+
+    return {
+        'interval': interval,
+        'periods': periods,
+        'net': _series(net, 100),
+        'balance': _series(balance, 100),
+        'projected_net': _series(projected, 100),
+        'projected_balance': _series(balance + np.cumsum(projected), 100)
+    }
@@ -0,0 +1,41 @@
+# utils/app_state.py
+from flask import current_app, has_app_context
+
+
+class PerApp:
+    """
+    Module-level handle to an object that exists once per Flask app.
+
+    `init_app(app)` builds the app's own instance with `factory`, configures
+    it and stores it in `app.extensions`. Attribute access is forwarded to the
+    instance of `current_app`, so code keeps calling `cache.get_or_compute(...)`
+    or `writes.run(...)` while two apps in one process (tests, preloaded
+    workers) never share a cache, a writer thread or a job table.
+    """
+
+    def __init__(self, key, factory):
+        self._key = key
+        self._factory = factory
+
+    def init_app(self, app):
+        """Create, configure and register `app`'s instance; returns it."""
+        instance = self._factory()
+        if hasattr(instance, 'init_app'):
+            instance.init_app(app)
+        app.extensions[self._key] = instance
+        return instance
+
+    def for_app(self, app=None):
+        """The instance of `app` (default: the current app), or None if it has none."""
+        if app is None:
+            if not has_app_context():
+                return None
+            app = current_app
+        return app.extensions.get(self._key)
+
+    def __getattr__(self, name):
+        # Outside an app context this raises Flask's usual "working outside of application context"
+        instance = current_app.extensions.get(self._key)
+        if instance is None:
+            raise RuntimeError(f'{self._key} is not set up for the current app; call init_app(app) first.')
+        return getattr(instance, name)
@@ -0,0 +1,311 @@
+# utils/batch.py
+from models.models import db, Transaction, Budget, BudgetAlert, Category
+from utils.pagination import transaction_filter_clauses
+from utils.rollup import apply_deltas, rows_to_deltas
+from utils.versioning import bump_versions, TRANSACTIONS, BUDGETS
+from utils.cache import invalidate_after_commit, tags_for_months, budget_month_tag
+from utils.budgets import sync_budget_alerts
+from utils.writer import WriteRejected
+from utils.money import parse_money
+from utils.categories import category_registry
+from sqlalchemy import tuple_
+from datetime import datetime
+
+OPERATIONS = ('update', 'recategorize', 'delete')
+# Rows one batch may touch; a filter matching more is refused rather than truncated
+MAX_BATCH_ROWS = 10000
+
+TRANSACTION_TYPES = ('Income', 'Expense')
+
+
+def parse_selection(payload):
+    """
+    (operation, ids, filter) from a batch request body; raises ValueError.
+
+    The body names an `operation` and selects rows either by `ids` (a list of
+    integers) or by `filter` (an object of list filters), never both.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('request body must be a JSON object')
+    operation = payload.get('operation')
+    if operation not in OPERATIONS:
+        raise ValueError(f"operation must be one of {', '.join(OPERATIONS)}")
+    ids = payload.get('ids')
+    filters = payload.get('filter')
+    if (ids is None) == (filters is None):
+        raise ValueError('select rows with either ids or filter')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError('ids must be a non-empty list of integers')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH_ROWS:
+            raise ValueError(f'at most {MAX_BATCH_ROWS} ids per batch')
+    elif not isinstance(filters, dict):
+        raise ValueError('filter must be an object')
+    return operation, ids, filters
+
+
+def _parse_category(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError('category_id must be an integer')
+    return value
+
+
+def _parse_amount(value):
+    amount = parse_money(str(value))
+    if amount <= 0:
+        raise ValueError('amount must be positive')
+    return amount
+
+
+def _parse_month(value):
+    datetime.strptime(str(value), '%Y-%m')
+    return str(value)
+
+
+def _parse_date(value):
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def _parse_description(value):
+    if not isinstance(value, str) or len(value) > 255:
+        raise ValueError('description must be a string of at most 255 characters')
+    return value
+
+
+def _parse_type(value):
+    if value not in TRANSACTION_TYPES:
+        raise ValueError(f"type must be one of {', '.join(TRANSACTION_TYPES)}")
+    return value
+
+
+def _parse_flag(value):
+    if not isinstance(value, bool):
+        raise ValueError('recurring must be true or false')
+    return value
+
+
+def transaction_changes(operation, payload):
+    """Column values a transaction batch sets; raises ValueError."""
+    if operation == 'delete':
+        return {}
+    if operation == 'recategorize':
+        return {'category_id': _parse_category(payload.get('category_id'))}
+    values = payload.get('values')
+    if not isinstance(values, dict) or not values:
+        raise ValueError('update needs a non-empty values object')
+    parsers = {
+        'date': _parse_date,
+        'description': _parse_description,
+        'amount': _parse_amount,
+        'type': _parse_type,
+        'category_id': _parse_category,
+        'recurring': _parse_flag,
+    }
+    return _parse_values(values, parsers)
+
+
+def budget_changes(operation, payload):
+    """Column values a budget batch sets; raises ValueError."""
+    if operation == 'delete':
+        return {}
+    if operation == 'recategorize':
+        return {'category_id': _parse_category(payload.get('category_id'))}
+    values = payload.get('values')
+    if not isinstance(values, dict) or not values:
+        raise ValueError('update needs a non-empty values object')
+    parsers = {
+        'amount': _parse_amount,
+        'month': _parse_month,
+        'category_id': _parse_category,
+    }
+    return _parse_values(values, parsers)
+
+
+def budget_filters(raw):
+    """Budget filters (month, category) from a batch request's filter object; raises ValueError."""
+    filters = {}
+    if raw.get('month'):
+        filters['month'] = _parse_month(raw['month'])
+    if raw.get('category') is not None:
+        filters['category_id'] = _parse_category(raw['category'])
+    if not filters:
+        raise ValueError('filter must contain month or category')
+    return filters
+
+
+def _parse_values(values, parsers):
+    unknown = set(values) - set(parsers)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    return {field: parsers[field](value) for field, value in values.items()}
+
+
+def _check_category(connection, changes):
+    """The type of the category `changes` moves rows to, or None if it sets no category."""
+    if 'category_id' not in changes:
+        return None
+    category_type = connection.execute(
+        db.select(Category.type).where(Category.id == changes['category_id'])
+    ).scalar()
+    if category_type is None:
+        raise WriteRejected('Category not found.')
+    return category_type
+
+
+def _check_transaction_type(connection, changes, rows):
+    """
+    Keep each transaction's type equal to its category's type, as the importer
+    does: a new category brings its type along, and a new type alone must
+    match the category every selected row already has.
+    """
+    category_type = _check_category(connection, changes)
+    if category_type is not None:
+        if changes.get('type', category_type) != category_type:
+            raise WriteRejected(f'The category is for {category_type} transactions.')
+        changes['type'] = category_type
+    elif 'type' in changes:
+        categories = category_registry.get()
+        if any(categories.type(row.category_id) != changes['type'] for row in rows):
+            raise WriteRejected(f"Some selected transactions are in a category that is not for {changes['type']}; "
+                                'set category_id as well.')
+
+
+def _select_targets(connection, columns, id_column, clauses, ids):
+    """The rows a batch applies to, by ids or by filter clauses, in id order."""
+    query = db.select(*columns).order_by(id_column)
+    if ids is not None:
+        return connection.execute(query.where(id_column.in_(ids))).all()
+    if not clauses:
+        # A filter without criteria would select every row
+        raise WriteRejected('The filter must contain at least one criterion.')
+    rows = connection.execute(query.where(*clauses).limit(MAX_BATCH_ROWS + 1)).all()
+    if len(rows) > MAX_BATCH_ROWS:
+        raise WriteRejected(f'The filter matches more than {MAX_BATCH_ROWS} rows; narrow it down.')
+    return rows
+
+
+def _outcome(operation, ids, rows, applied):
+    """Per-id results: 'updated' or 'deleted', 'conflict' if skipped, 'not_found' if missing."""
+    status = 'deleted' if operation == 'delete' else 'updated'
+    found = {row.id for row in rows}
+    results = [{'id': row.id, 'status': status if row.id in applied else 'conflict'} for row in rows]
+    if ids is not None:
+        results += [{'id': i, 'status': 'not_found'} for i in ids if i not in found]
+    return {'operation': operation, 'matched': len(rows), 'applied': len(applied), 'results': results}
+
+
+def batch_transactions(operation, changes, ids=None, filters=None):
+    """
+    Apply one operation to many transactions in one set-based statement.
+
+    Rows are selected by `ids` or by list `filters`. Moving rows to another
+    category sets their type to the category's type. The previous values are
+    read first, then a single UPDATE ... RETURNING or DELETE applies the change,
+    and the rollup, budget alerts, data version and cache are brought up to date
+    from the old and new rows in the same transaction; the search index follows
+    through its triggers. Run it through writes.run, which commits.
+    Returns a plain dict with the outcome for every selected id.
+    """
+    session = db.session
+    connection = session.connection()
+    table = Transaction.__table__
+
+    fields = (table.c.date, table.c.category_id, table.c.type, table.c.amount)
+    rows = _select_targets(connection, (table.c.id,) + fields, table.c.id,
+                           transaction_filter_clauses(filters or {}), ids)
+    _check_transaction_type(connection, changes, rows)
+    target_ids = [row.id for row in rows]
+    if not target_ids:
+        return _outcome(operation, ids, rows, set())
+
+    # The old contributions leave the rollup; updated rows add their new ones back
+    deltas = rows_to_deltas([tuple(row[1:]) for row in rows], sign=-1)
+    if operation == 'delete':
+        connection.execute(table.delete().where(table.c.id.in_(target_ids)))
+    else:
+        updated = connection.execute(
+            table.update().where(table.c.id.in_(target_ids)).values(**changes).returning(*fields)
+        ).all()
+        rows_to_deltas(updated, deltas=deltas)
+
+    apply_deltas(session, deltas)
+    bump_versions(session, [TRANSACTIONS])
+    invalidate_after_commit(session, tags_for_months(month for month, _, _ in deltas))
+    return _outcome(operation, ids, rows, set(target_ids))
+
+
+def batch_budgets(operation, changes, ids=None, filters=None):
+    """
+    Apply one operation to many budgets in one set-based statement.
+
+    Updates that would move a budget onto a (category, month) another budget
+    already holds are skipped and reported as 'conflict'; the rest are applied.
+    Alerts of updated budgets are re-checked against the rollup, and those of
+    deleted budgets removed with them. Run it through writes.run, which commits.
+    """
+    session = db.session
+    connection = session.connection()
+    table = Budget.__table__
+    _check_category(connection, changes)
+
+    clauses = []
+    if filters:
+        if filters.get('month'):
+            clauses.append(table.c.month == filters['month'])
+        if filters.get('category_id'):
+            clauses.append(table.c.category_id == filters['category_id'])
+    rows = _select_targets(connection, (table.c.id, table.c.category_id, table.c.month), table.c.id, clauses, ids)
+    if not rows:
+        return _outcome(operation, ids, rows, set())
+
+    months = {row.month for row in rows}
+    if operation == 'delete':
+        applied = [row.id for row in rows]
+        # Core deletes do not cascade to the alerts the way the ORM relationship does
+        connection.execute(BudgetAlert.__table__.delete().where(BudgetAlert.__table__.c.budget_id.in_(applied)))
+        connection.execute(table.delete().where(table.c.id.in_(applied)))
+    else:
+        applied = _unique_moves(connection, table, rows, changes)
+        if applied:
+            connection.execute(table.update().where(table.c.id.in_(applied)).values(**changes))
+            sync_budget_alerts(session, budget_ids=applied)
+        if 'month' in changes:
+            months.add(changes['month'])
+
+    if applied:
+        bump_versions(session, [BUDGETS])
+        invalidate_after_commit(session, {budget_month_tag(month) for month in months})
+    return _outcome(operation, ids, rows, set(applied))
+
+
+def _unique_moves(connection, table, rows, changes):
+    """
+    Ids of the budgets that can take the new category/month without colliding
+    with another budget. Every row gets the same new values, so rows already at
+    their target claim it first, then the lowest id wins.
+    """
+    if 'category_id' not in changes and 'month' not in changes:
+        return [row.id for row in rows]
+
+    def target(row):
+        return changes.get('category_id', row.category_id), changes.get('month', row.month)
+
+    selected = {row.id for row in rows}
+    targets = {target(row) for row in rows}
+    occupied = {
+        (category_id, month)
+        for budget_id, category_id, month in connection.execute(
+            db.select(table.c.id, table.c.category_id, table.c.month)
+            .where(tuple_(table.c.category_id, table.c.month).in_(sorted(targets)))
+        )
+        if budget_id not in selected
+    }
+    applied = []
+    claimed = set()
+    for row in sorted(rows, key=lambda row: ((row.category_id, row.month) != target(row), row.id)):
+        key = target(row)
+        if key not in occupied and key not in claimed:
+            claimed.add(key)
+            applied.append(row.id)
+    return applied
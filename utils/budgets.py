@@ -0,0 +1,175 @@
+# utils/budgets.py
+from models.models import db, Budget, BudgetAlert, MonthlyRollup
+from utils.money import cents, from_cents
+from utils.categories import category_registry
+from flask import current_app, has_app_context
+from sqlalchemy import and_, event, func, inspect, or_, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_THRESHOLDS = (80, 100)
+
+
+def alert_thresholds():
+    if has_app_context():
+        return current_app.config.get('BUDGET_ALERT_THRESHOLDS', DEFAULT_ALERT_THRESHOLDS)
+    return DEFAULT_ALERT_THRESHOLDS
+
+
+def budget_spending_query():
+    """
+    Budgets with their amount and spending, both in integer cents.
+
+    Spending is read from the monthly rollup, which every write path keeps up
+    to date, so this is one primary-key lookup per budget rather than an
+    aggregate over the month's transactions.
+    """
+    return db.select(
+        Budget.id,
+        Budget.category_id,
+        Budget.month,
+        cents(Budget.amount).label('amount'),
+        cents(func.coalesce(func.sum(MonthlyRollup.total), 0)).label('spent')
+    ).outerjoin(MonthlyRollup, and_(
+        MonthlyRollup.month == Budget.month,
+        MonthlyRollup.category_id == Budget.category_id
+    )).group_by(Budget.id)
+
+
+def spent_by_category(month):
+    """{category_id: spent Decimal} for the budgets of a month."""
+    rows = db.session.execute(budget_spending_query().where(Budget.month == month))
+    return {row.category_id: from_cents(row.spent) for row in rows}
+
+
+def crossed_thresholds(amount, spent, thresholds):
+    if amount <= 0:
+        return set()
+    # Integer cents on both sides, so no rounding decides whether a threshold is crossed
+    return {level for level in thresholds if spent * 100 >= amount * level}
+
+
+def sync_budget_alerts(session, pairs=None, budget_ids=None, announce=True):
+    """
+    Bring the alert rows for some budgets in line with their current spending.
+
+    `pairs` selects budgets by (category_id, month) and `budget_ids` by id;
+    given both, budgets matching either are checked.
+    Thresholds newly crossed get an alert row (the alert event, reported once
+    the transaction commits, unless `announce` is off for a backfill);
+    thresholds spending has fallen back below lose theirs, so crossing again
+    alerts again.
+    """
+    criteria = []
+    if pairs:
+        criteria.append(tuple_(Budget.category_id, Budget.month).in_(sorted(pairs)))
+    if budget_ids:
+        criteria.append(Budget.id.in_(sorted(budget_ids)))
+    if not criteria:
+        return []
+    query = budget_spending_query().where(or_(*criteria))
+    connection = session.connection()
+    budgets = connection.execute(query).all()
+    if not budgets:
+        return []
+
+    thresholds = alert_thresholds()
+    ids = [row.id for row in budgets]
+    existing = set(connection.execute(
+        db.select(BudgetAlert.budget_id, BudgetAlert.threshold).where(BudgetAlert.budget_id.in_(ids))
+    ).all())
+
+    categories = category_registry.get()
+    now = datetime.utcnow()
+    raised = []
+    cleared = []
+    for row in budgets:
+        crossed = crossed_thresholds(row.amount, row.spent, thresholds)
+        for level in crossed:
+            if (row.id, level) not in existing:
+                raised.append({
+                    'budget_id': row.id,
+                    'threshold': level,
+                    'spent': from_cents(row.spent),
+                    'created_at': now,
+                    'category': categories.name(row.category_id),
+                    'month': row.month,
+                    'amount': from_cents(row.amount)
+                })
+        cleared += [(budget_id, level) for budget_id, level in existing
+                    if budget_id == row.id and level not in crossed]
+
+    table = BudgetAlert.__table__
+    if raised:
+        connection.execute(
+            sqlite_insert(table).on_conflict_do_nothing(index_elements=[table.c.budget_id, table.c.threshold]),
+            [{key: alert[key] for key in ('budget_id', 'threshold', 'spent', 'created_at')} for alert in raised]
+        )
+        if announce:
+            session.info.setdefault('budget_alerts', []).extend(raised)
+    if cleared:
+        connection.execute(table.delete().where(tuple_(table.c.budget_id, table.c.threshold).in_(cleared)))
+    return raised
+
+
+def budget_alerts_for_month(month):
+    """Alerts of a month's budgets, highest threshold first per budget."""
+    return BudgetAlert.query.join(Budget).filter(Budget.month == month)\
+        .options(db.contains_eager(BudgetAlert.budget))\
+        .order_by(Budget.category_id, BudgetAlert.threshold.desc()).all()
+
+
+def serialize_alert(alert):
+    return {
+        'id': alert.id,
+        'budget_id': alert.budget_id,
+        'category': category_registry.get().name(alert.budget.category_id),
+        'month': alert.budget.month,
+        'threshold': alert.threshold,
+        'budget': float(alert.budget.amount),
+        'spent': float(alert.spent),
+        'created_at': alert.created_at.isoformat()
+    }
+
+
+def _previous_value(attr):
+    history = attr.history
+    return (history.deleted or history.unchanged or [attr.value])[0]
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_alerts_for_changed_budgets(session, flush_context):
+    # A new budget, or a changed amount, month or category, may already be past a threshold
+    budget_ids = set()
+    pairs = set()
+    for obj in session.new:
+        if isinstance(obj, Budget):
+            budget_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Budget) and session.is_modified(obj):
+            attrs = inspect(obj).attrs
+            if not any(attrs[key].history.has_changes() for key in ('amount', 'month', 'category_id')):
+                continue
+            budget_ids.add(obj.id)
+            # Both the (category, month) the budget left and the one it moved to are re-checked
+            pairs.add((_previous_value(attrs.category_id), _previous_value(attrs.month)))
+            pairs.add((obj.category_id, obj.month))
+    if budget_ids or pairs:
+        sync_budget_alerts(session, pairs=pairs, budget_ids=budget_ids)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _report_budget_alerts(session):
+    for alert in session.info.pop('budget_alerts', ()):
+        logger.warning(
+            "Budget alert: %s reached %s%% of its %s budget for %s (spent %s).",
+            alert['category'], alert['threshold'], alert['amount'], alert['month'], alert['spent']
+        )
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_budget_alerts(session):
+    session.info.pop('budget_alerts', None)
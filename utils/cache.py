@@ -0,0 +1,242 @@
+# utils/cache.py
+from models.models import db, Budget, Category, DataVersion
+from utils.rollup import collect_deltas, month_key
+from utils.versioning import TRANSACTIONS, BUDGETS
+from utils.app_state import PerApp
+from sqlalchemy import event, inspect
+from collections import OrderedDict
+from datetime import date, timedelta
+import threading
+import time
+
+# Tag attached to entries that aggregate every month before the current one
+HISTORY_TAG = 'history'
+
+
+def month_tag(month):
+    return f'month:{month}'
+
+
+def budget_month_tag(month):
+    return f'budgets:{month}'
+
+
+def tags_for_months(months, today=None):
+    """Invalidation tags for transaction writes that touched the given 'YYYY-MM' months."""
+    current_month = month_key(today or date.today())
+    tags = set()
+    for month in months:
+        tags.add(month_tag(month))
+        if month < current_month:
+            tags.add(HISTORY_TAG)
+    return tags
+
+
+def range_month_tags(start_date, end_date):
+    """Month tags for every month overlapping [start_date, end_date]."""
+    tags = set()
+    day = start_date.replace(day=1)
+    while day <= end_date:
+        tags.add(month_tag(month_key(day)))
+        day = (day + timedelta(days=32)).replace(day=1)
+    return tags
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a TTL and an entry bound for computed payloads.
+
+    Entries carry tags so local writes can drop exactly the months they touched.
+    Writes made by other processes are detected through the data_version table:
+    any version this process did not produce itself clears the cache.
+    """
+
+    def __init__(self, max_entries=512, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tag_index = {}  # tag -> set(keys)
+        self._known_versions = {}
+        self._epoch = 0  # bumped on every invalidation
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config['CACHE_MAX_ENTRIES']
+        self.ttl = app.config['CACHE_TTL_SECONDS']
+
+    # -- bookkeeping ------------------------------------------------------ #
+
+    def _remove(self, key):
+        value, expires_at, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tag_index.clear()
+            self._epoch += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            self._epoch += 1
+
+    def note_local_versions(self, bumped):
+        # A local commit moved a table from v to v + 1: nothing unseen happened in between
+        with self._lock:
+            for name, versions in bumped.items():
+                for version in sorted(versions):
+                    if self._known_versions.get(name, 0) + 1 == version:
+                        self._known_versions[name] = version
+
+    def sync_versions(self):
+        """Drop everything if another process changed data since we last looked."""
+        rows = db.session.query(DataVersion.name, DataVersion.version).all()
+        with self._lock:
+            changed = False
+            for name, version in rows:
+                if self._known_versions.get(name, 0) != version:
+                    self._known_versions[name] = version
+                    changed = True
+            if changed and self._entries:
+                self.clear()
+
+    # -- public API ------------------------------------------------------- #
+
+    def get_or_compute(self, key, compute, tags=()):
+        self.sync_versions()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            epoch = self._epoch
+
+        value = compute()
+
+        with self._lock:
+            # Skip storing if an invalidation raced with the computation
+            if epoch != self._epoch:
+                return value
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, frozenset(tags))
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def prometheus_lines(self):
+        stats = self.stats()
+        lines = []
+        for name, kind, help_text in (
+            ('hits', 'counter', 'Cache lookups served from memory.'),
+            ('misses', 'counter', 'Cache lookups that had to compute the result.'),
+            ('evictions', 'counter', 'Entries evicted to stay within the size bound.'),
+            ('invalidations', 'counter', 'Entries dropped because a write touched their data.'),
+            ('entries', 'gauge', 'Entries currently cached.')
+        ):
+            metric = f'pennypilot_cache_{name}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}', f'{metric} {stats[name]}']
+        return lines
+
+
+# One cache per app; calls go to the current app's
+cache = PerApp('result_cache', ResultCache)
+
+
+def invalidate_after_commit(session, tags):
+    """Queue cache tags to drop once the session's transaction commits."""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def clear_after_commit(session):
+    """Drop the whole cache once the session's transaction commits."""
+    session.info['cache_clear'] = True
+
+
+def _budget_months(session):
+    months = set()
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        if not isinstance(obj, Budget):
+            continue
+        months.add(obj.month)
+        history = inspect(obj).attrs.month.history
+        months.update(history.deleted or ())
+    return months
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_cache_tags(session, flush_context):
+    tags = set()
+    if any(isinstance(obj, Category) for obj in list(session.new) + list(session.deleted) + list(session.dirty)):
+        # Category names and types appear in every cached payload
+        clear_after_commit(session)
+    months = {month for month, category_id, txn_type in collect_deltas(session)}
+    tags |= tags_for_months(months)
+    tags |= {budget_month_tag(month) for month in _budget_months(session)}
+    if tags:
+        invalidate_after_commit(session, tags)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    bumped = session.info.pop('bumped_versions', None)
+    clear = session.info.pop('cache_clear', False)
+    # A cached table changed without saying which months: be safe and drop everything
+    if not tags and bumped and (TRANSACTIONS in bumped or BUDGETS in bumped):
+        clear = True
+    result_cache = cache.for_app()
+    if result_cache is None:
+        return
+    if clear:
+        result_cache.clear()
+    elif tags:
+        result_cache.invalidate(tags)
+    if bumped:
+        result_cache.note_local_versions(bumped)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('cache_tags', None)
+    session.info.pop('bumped_versions', None)
+    session.info.pop('cache_clear', None)
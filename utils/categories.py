@@ -0,0 +1,97 @@
+# utils/categories.py
+from models.models import db, Category, DataVersion
+from utils.versioning import CATEGORIES
+from utils.app_state import PerApp
+from sqlalchemy import event
+from collections import namedtuple
+import threading
+import time
+
+CategoryInfo = namedtuple('CategoryInfo', ['id', 'name', 'type'])
+
+# How often a process re-reads the categories data version to notice changes made
+# by other processes; changes committed in this process are seen immediately
+REVALIDATE_SECONDS = 1.0
+
+
+class CategorySnapshot:
+    """Immutable view of the category table: lookups both ways and sorted select choices."""
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.all = [CategoryInfo(*row) for row in sorted(rows, key=lambda row: row[1])]
+        self.by_id = {info.id: info for info in self.all}
+        self.by_name = {info.name: info for info in self.all}
+        self.choices = [(info.id, info.name) for info in self.all]
+        self.expense_choices = [(info.id, info.name) for info in self.all if info.type == 'Expense']
+
+    def name(self, category_id, default='Unknown'):
+        info = self.by_id.get(category_id)
+        return info.name if info else default
+
+    def type(self, category_id, default=None):
+        info = self.by_id.get(category_id)
+        return info.type if info else default
+
+    def of_type(self, category_type):
+        return [info for info in self.all if info.type == category_type]
+
+
+class CategoryRegistry:
+    """
+    Per-app, in-process cache of the category table.
+
+    Forms, the importer, exporters and views read names, types and choice
+    lists from here instead of querying or lazy-loading Category. Commits in
+    this process that touch a category drop the snapshot; changes from other
+    processes are noticed through the categories data version, checked at
+    most every REVALIDATE_SECONDS.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < REVALIDATE_SECONDS:
+            return snapshot
+        version = db.session.query(DataVersion.version).filter(DataVersion.name == CATEGORIES).scalar() or 0
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                rows = db.session.query(Category.id, Category.name, Category.type).all()
+                snapshot = CategorySnapshot(rows, version)
+                self._snapshot = snapshot
+                self.loads += 1
+            self._checked_at = now
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+
+# Per app, since apps in one process may use different databases
+category_registry = PerApp('category_registry', CategoryRegistry)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _note_category_changes(session, flush_context):
+    if any(isinstance(obj, Category) for obj in list(session.new) + list(session.deleted) + list(session.dirty)):
+        session.info['categories_changed'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_categories_after_commit(session):
+    registry = category_registry.for_app()
+    if session.info.pop('categories_changed', False) and registry is not None:
+        registry.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_category_changes(session):
+    session.info.pop('categories_changed', None)
@@ -0,0 +1,106 @@
+# utils/export.py
+from models.models import db, Transaction
+from utils.categories import category_registry
+from utils.money import cents, format_cents
+from io import StringIO
+import csv
+import json
+
+# Rows fetched from the database cursor per round trip while streaming
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'transactions.csv'),
+    'json': ('application/json', 'transactions.json'),
+    'ndjson': ('application/x-ndjson', 'transactions.ndjson'),
+}
+
+CSV_HEADER = ['ID', 'Amount', 'Date', 'Description', 'Category']
+
+
+def export_query(start_date=None, end_date=None, category_id=None):
+    """
+    Column select for exported transactions. Amounts come back as integer cents;
+    category names are filled in from the category registry while streaming.
+    """
+    query = db.select(
+        Transaction.id,
+        cents(Transaction.amount).label('amount'),
+        Transaction.date,
+        Transaction.description,
+        Transaction.category_id
+    )
+
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date <= end_date)
+    if category_id:
+        query = query.where(Transaction.category_id == category_id)
+
+    return query.order_by(Transaction.id)
+
+
+def _partitions(query):
+    # yield_per keeps a cursor open and pulls EXPORT_BATCH_SIZE rows at a time
+    result = db.session.execute(query, execution_options={'yield_per': EXPORT_BATCH_SIZE})
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _record(row, categories):
+    return {
+        'id': row.id,
+        'amount': row.amount / 100,
+        'date': row.date.strftime('%Y-%m-%d'),
+        'description': row.description,
+        'category': categories.name(row.category_id)
+    }
+
+
+def stream_csv(query):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    categories = category_registry.get()
+    writer.writerow(CSV_HEADER)
+    yield flush()
+    for partition in _partitions(query):
+        for row in partition:
+            writer.writerow([row.id, format_cents(row.amount), row.date.strftime('%Y-%m-%d'), row.description,
+                             categories.name(row.category_id)])
+        yield flush()
+
+
+def stream_json(query):
+    categories = category_registry.get()
+    yield '['
+    separator = '\n'
+    for partition in _partitions(query):
+        chunk = []
+        for row in partition:
+            chunk.append(separator + json.dumps(_record(row, categories)))
+            separator = ',\n'
+        yield ''.join(chunk)
+    yield '\n]\n'
+
+
+def stream_ndjson(query):
+    categories = category_registry.get()
+    for partition in _partitions(query):
+        yield ''.join(json.dumps(_record(row, categories)) + '\n' for row in partition)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'json': stream_json,
+    'ndjson': stream_ndjson,
+}
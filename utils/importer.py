@@ -0,0 +1,189 @@
+# utils/importer.py
+from models.models import db, Transaction
+from utils.categories import category_registry
+from utils.rollup import apply_deltas, rows_to_deltas
+from utils.versioning import bump_versions, TRANSACTIONS
+from utils.cache import invalidate_after_commit, tags_for_months
+from utils.money import parse_money
+from datetime import date
+from decimal import Decimal
+import codecs
+import csv
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+# Failed rows beyond this are still counted, just not listed in the summary
+MAX_FAILURE_DETAILS = 500
+JSON_READ_SIZE = 64 * 1024
+
+
+class ImportResult:
+    """Running counters for an import; safe to read while the import is in progress."""
+
+    def __init__(self):
+        self.parsed = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.failure_details = []
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    def add_failure(self, key, record, error):
+        self.failure_count += 1
+        if len(self.failure_details) < MAX_FAILURE_DETAILS:
+            self.failure_details.append({key: record, 'error': str(error)})
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.parsed / elapsed if elapsed > 0 else 0.0
+
+
+def iter_csv_records(binary_stream):
+    """Yield (raw_row, record) pairs from a CSV upload without reading it all into memory."""
+    text = codecs.getreader('utf-8-sig')(binary_stream)
+    reader = csv.reader(text)
+    next(reader, None)  # Header: ID, Amount, Date, Description, Category
+    for row in reader:
+        if not row:
+            continue
+        try:
+            record = {'amount': row[1], 'date': row[2], 'description': row[3], 'category': row[4]}
+        except IndexError:
+            record = None
+        yield row, record
+
+
+def iter_json_records(binary_stream):
+    """
+    Yield (item, item) pairs from a JSON array upload or an NDJSON upload,
+    decoding one element at a time from a bounded read buffer.
+    """
+    text = codecs.getreader('utf-8-sig')(binary_stream)
+    # Amounts decode straight to Decimal, so no float rounding creeps in before the cents conversion
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    buffer = ''
+    pos = 0
+    in_array = None
+    exhausted = False
+
+    while True:
+        # Skip whitespace and array punctuation between elements
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if in_array is None and pos < len(buffer):
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+                continue
+        if in_array and pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos >= len(buffer):
+                raise ValueError('need more data')
+            item, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if exhausted:
+                if buffer[pos:].strip():
+                    raise json.JSONDecodeError('Unexpected end of JSON data', buffer, pos)
+                return
+            chunk = text.read(JSON_READ_SIZE)
+            exhausted = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        # A number at the very end of the buffer may be cut short; read more before trusting it
+        if end == len(buffer) and not exhausted and not isinstance(item, (dict, list)):
+            chunk = text.read(JSON_READ_SIZE)
+            exhausted = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        pos = end
+        yield item, item
+
+
+def _to_mapping(record, categories):
+    category = categories.get(record['category'])
+    if not category:
+        raise ValueError('Category not found')
+    return {
+        'amount': parse_money(record['amount']),
+        'date': date.fromisoformat(record['date']),
+        'description': record.get('description') or '',
+        'type': category.type,
+        'recurring': False,
+        'category_id': category.id,
+        'recurring_transaction_id': None
+    }
+
+
+def _insert_chunk(mappings):
+    db.session.execute(Transaction.__table__.insert(), mappings)
+    # Core executemany bypasses the ORM flush listener, so roll the chunk up here
+    deltas = rows_to_deltas((m['date'], m['category_id'], m['type'], m['amount']) for m in mappings)
+    apply_deltas(db.session, deltas)
+    invalidate_after_commit(db.session, tags_for_months(month for month, _, _ in deltas))
+    bump_versions(db.session, [TRANSACTIONS])
+    db.session.commit()
+
+
+def import_records(records, failure_key, chunk_size=DEFAULT_CHUNK_SIZE, result=None, progress=None):
+    """
+    Insert (raw, record) pairs in chunks of `chunk_size`, committing per chunk.
+    `progress`, if given, is called after each chunk.
+    Returns an ImportResult with the same success/failure report as before.
+    """
+    result = result or ImportResult()
+    categories = category_registry.get().by_name
+    pending = []
+    pending_raw = []
+
+    def flush():
+        try:
+            _insert_chunk(pending)
+            result.success_count += len(pending)
+        except Exception as chunk_error:
+            db.session.rollback()
+            logger.error("Error inserting import chunk of %s rows: %s", len(pending), chunk_error)
+            for raw in pending_raw:
+                result.add_failure(failure_key, raw, chunk_error)
+        pending.clear()
+        pending_raw.clear()
+        if progress is not None:
+            progress()
+
+    for raw, record in records:
+        result.parsed += 1
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('Malformed record')
+            pending.append(_to_mapping(record, categories))
+            pending_raw.append(raw)
+        except Exception as row_error:
+            result.add_failure(failure_key, raw, row_error)
+            logger.debug("Error processing %s: %s - %s", failure_key, raw, row_error)
+        if len(pending) >= chunk_size:
+            flush()
+
+    if pending:
+        flush()
+    result.finished_at = time.monotonic()
+    return result
+
+
+def import_file(binary_stream, filename, chunk_size=DEFAULT_CHUNK_SIZE, result=None, progress=None):
+    """Import a CSV, JSON or NDJSON upload by file extension."""
+    if filename.endswith('.csv'):
+        return import_records(iter_csv_records(binary_stream), 'row', chunk_size, result, progress)
+    if filename.endswith('.json') or filename.endswith('.ndjson'):
+        return import_records(iter_json_records(binary_stream), 'item', chunk_size, result, progress)
+    raise ValueError(f'Unsupported file format: {filename}')
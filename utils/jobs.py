@@ -0,0 +1,218 @@
+# utils/jobs.py
+from models.models import db, ImportJobRecord
+from utils.importer import ImportResult, import_file
+from utils.writer import writes
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are kept this long so their result pages stay reachable
+JOB_RETENTION_SECONDS = 60 * 60
+# An unfinished job whose row has not been saved for this long lost its worker process
+STALE_JOB_SECONDS = 10 * 60
+
+
+class ImportJob:
+    def __init__(self, filename, path):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.path = path
+        self.status = 'queued'  # queued -> running -> completed | failed
+        self.error = None
+        self.result = ImportResult()
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    @classmethod
+    def from_record(cls, record):
+        """A read-only copy of a job another process runs (or ran), as of its last save."""
+        job = cls.__new__(cls)
+        job.id = record.id
+        job.filename = record.filename
+        job.path = None
+        job.status = record.status
+        job.error = record.error
+        job.created_at = record.created_at
+        job.finished_at = record.finished_at
+        result = ImportResult()
+        result.parsed = record.parsed
+        result.success_count = record.inserted
+        result.failure_count = record.failed
+        result.failure_details = json.loads(record.failure_details) if record.failure_details else []
+        result.finished_at = result.started_at + record.elapsed
+        job.result = result
+        if not job.done and datetime.utcnow() - record.updated_at > timedelta(seconds=STALE_JOB_SECONDS):
+            job.status = 'failed'
+            job.error = 'The import was interrupted.'
+        return job
+
+    @property
+    def done(self):
+        return self.status in ('completed', 'failed')
+
+    def record_values(self):
+        """Column values for this job's import_job row."""
+        result = self.result
+        return {
+            'status': self.status,
+            'error': self.error,
+            'parsed': result.parsed,
+            'inserted': result.success_count,
+            'failed': result.failure_count,
+            'elapsed': result.elapsed if self.status != 'queued' else 0.0,
+            'failure_details': json.dumps(result.failure_details) if self.done else None,
+            'updated_at': datetime.utcnow(),
+            'finished_at': self.finished_at
+        }
+
+    def to_dict(self):
+        result = self.result
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'error': self.error,
+            'parsed': result.parsed,
+            'inserted': result.success_count,
+            'failed': result.failure_count,
+            'elapsed': round(result.elapsed, 3) if self.status != 'queued' else 0,
+            'rows_per_second': round(result.rows_per_second, 1) if self.status != 'queued' else 0,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class ImportJobManager:
+    """
+    Runs uploads on a small bounded worker pool so large imports never hold a
+    request thread, and keeps per-job progress for polling.
+
+    The pool and its IMPORT_MAX_PENDING bound are per process, but every job
+    has an import_job row that is saved after each chunk, so a poll landing on
+    another worker process still finds the job and its progress.
+    """
+
+    def __init__(self, app=None):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config['IMPORT_WORKERS']
+        self.max_pending = app.config['IMPORT_MAX_PENDING']
+        self.chunk_size = app.config['IMPORT_CHUNK_SIZE']
+
+    def _get_executor(self):
+        # Created lazily so processes that never import do not start threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='import')
+        return self._executor
+
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self, file_storage):
+        """Spool an uploaded file to disk and queue it. Returns None when the queue is full."""
+        self._prune()
+        if self.pending_count() >= self.max_pending:
+            return None
+
+        suffix = os.path.splitext(file_storage.filename)[1]
+        fd, path = tempfile.mkstemp(prefix='pennypilot-import-', suffix=suffix)
+        with os.fdopen(fd, 'wb') as spool:
+            file_storage.save(spool)
+
+        job = ImportJob(file_storage.filename, path)
+        try:
+            writes.run(lambda: self._insert_record(job))
+        except Exception:
+            os.remove(path)
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+        self._get_executor().submit(self._run, job)
+        logger.info("Queued import job %s for %s.", job.id, job.filename)
+        return job
+
+    def get(self, job_id):
+        """The job with this id, live if this process runs it, else as last saved; None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = db.session.get(ImportJobRecord, job_id)
+        return ImportJob.from_record(record) if record is not None else None
+
+    @staticmethod
+    def _insert_record(job):
+        # Rows of long finished jobs are dropped as new ones arrive
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION_SECONDS)
+        db.session.execute(db.delete(ImportJobRecord).where(ImportJobRecord.finished_at < cutoff))
+        db.session.add(ImportJobRecord(id=job.id, filename=job.filename, created_at=job.created_at,
+                                       updated_at=job.created_at))
+
+    def _save(self, job):
+        """Write the job's progress to its row; called from the import thread between chunks."""
+        try:
+            db.session.execute(
+                db.update(ImportJobRecord).where(ImportJobRecord.id == job.id).values(**job.record_values())
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Could not save the progress of import job %s: %s", job.id, e)
+
+    def _run(self, job):
+        job.status = 'running'
+        job.result.started_at = time.monotonic()
+        with self.app.app_context():
+            try:
+                self._save(job)
+                with open(job.path, 'rb') as stream:
+                    import_file(stream, job.filename, chunk_size=self.chunk_size, result=job.result,
+                                progress=lambda: self._save(job))
+                job.status = 'completed'
+                logger.info(
+                    "Import job %s completed: %s successes, %s failures in %.2fs.",
+                    job.id, job.result.success_count, job.result.failure_count, job.result.elapsed
+                )
+            except Exception as e:
+                db.session.rollback()
+                job.result.finished_at = time.monotonic()
+                job.error = 'Invalid JSON file.' if isinstance(e, json.JSONDecodeError) else str(e)
+                job.status = 'failed'
+                logger.error("Import job %s failed: %s", job.id, e)
+                logger.debug("Traceback:", exc_info=True)
+            finally:
+                job.finished_at = datetime.utcnow()
+                self._save(job)
+                db.session.remove()
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
+
+    def _prune(self):
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at and (now - job.finished_at).total_seconds() > JOB_RETENTION_SECONDS
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
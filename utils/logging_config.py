@@ -0,0 +1,180 @@
+# utils/logging_config.py
+from flask import g, has_request_context
+from utils.app_state import PerApp
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import logging
+import os
+import queue
+import random
+
+# Application loggers; everything under them shares the same pipeline
+LOGGER_NAMES = ('app', 'utils')
+
+# Default level per APP_ENV when LOG_LEVEL is not set
+ENV_LEVELS = {
+    'development': 'DEBUG',
+    'testing': 'WARNING',
+    'production': 'INFO',
+}
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands the record over untouched.
+
+    The stock handler formats the message on the calling thread before
+    enqueueing; records never leave this process, so message interpolation
+    and traceback rendering are left to the listener thread instead.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class AppQueueHandler(DeferredQueueHandler):
+    """
+    The one handler on the application loggers, which are process-wide. Each
+    record goes to the queue of the app whose context is active, or of the app
+    set up last when there is none, so every app writes to its own log files.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self.fallback = None
+
+    def enqueue(self, record):
+        pipeline = logging_pipeline.for_app() or self.fallback
+        if pipeline is not None and pipeline.queue is not None:
+            pipeline.queue.put_nowait(record)
+
+
+def _sampled():
+    return has_request_context() and g.get('log_debug', False)
+
+
+class SampledLogger(logging.Logger):
+    """
+    Logger that answers isEnabledFor below `base_level` only inside requests
+    picked by the debug sampler, so elsewhere a debug call stays a level check
+    and never builds a LogRecord.
+    """
+
+    base_level = logging.INFO
+
+    def isEnabledFor(self, level):
+        if level < self.base_level and not _sampled():
+            return False
+        return super().isEnabledFor(level)
+
+
+class SampledDebugFilter(logging.Filter):
+    """Let DEBUG records through only for requests picked by the debug sampler."""
+
+    def __init__(self, base_level):
+        super().__init__()
+        self.base_level = base_level
+
+    def filter(self, record):
+        # Backstop for loggers created after init_app, which are plain Loggers
+        return record.levelno >= self.base_level or _sampled()
+
+
+def _parse_level(value, default):
+    """A level number from a name such as 'debug' or 'INFO'; `default` if the name is unknown."""
+    level = logging.getLevelName(str(value).strip().upper())
+    return level if isinstance(level, int) else logging.getLevelName(default)
+
+
+def _app_loggers():
+    """The application loggers and every child logger created so far."""
+    prefixes = tuple(name + '.' for name in LOGGER_NAMES)
+    names = [name for name in logging.Logger.manager.loggerDict if name.startswith(prefixes)]
+    return [logging.getLogger(name) for name in LOGGER_NAMES + tuple(names)]
+
+
+class LoggingPipeline:
+    def __init__(self):
+        self.listener = None
+        self.queue = None
+
+    def init_app(self, app):
+        """
+        Route the application loggers through a queue drained by a background
+        listener that owns the console and rotating file handlers, so request
+        threads never wait on log I/O.
+        """
+        config = app.config
+        env = config.get('APP_ENV', 'production')
+        default_level = ENV_LEVELS.get(env, 'INFO')
+        level = _parse_level(config.get('LOG_LEVEL') or default_level, default_level)
+        file_level = _parse_level(config.get('LOG_FILE_LEVEL') or 'INFO', 'INFO')
+        sample_rate = config.get('LOG_DEBUG_SAMPLE_RATE', 0.0)
+        sampled = sample_rate > 0 and level > logging.DEBUG
+
+        handlers = []
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.DEBUG)
+        handlers.append(console_handler)
+        log_dir = config.get('LOG_DIR')
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                os.path.join(log_dir, 'app.log'), maxBytes=10 * 1024 * 1024, backupCount=5
+            )
+            file_handler.setLevel(file_level)
+            handlers.append(file_handler)
+        formatter = logging.Formatter(LOG_FORMAT)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        self.queue = queue.SimpleQueue()
+        # Logger levels and sampling are process-wide; the app set up last decides them
+        for old_filter in list(_queue_handler.filters):
+            _queue_handler.removeFilter(old_filter)
+        if sampled:
+            # Debug calls stay cheap level checks except while a sampled request is active
+            _queue_handler.addFilter(SampledDebugFilter(level))
+            SampledLogger.base_level = level
+            logger_level = logging.DEBUG
+        else:
+            logger_level = level
+
+        for logger in _app_loggers():
+            logger.__class__ = SampledLogger if sampled else logging.Logger
+            if logger.name not in LOGGER_NAMES:
+                continue
+            for handler in list(logger.handlers):
+                if isinstance(handler, DeferredQueueHandler) and handler is not _queue_handler:
+                    logger.removeHandler(handler)
+            logger.setLevel(logger_level)
+            if _queue_handler not in logger.handlers:
+                logger.addHandler(_queue_handler)
+            logger.propagate = False
+
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        _queue_handler.fallback = self
+        atexit.register(self.stop)
+
+        for setting in ('LOG_LEVEL', 'LOG_FILE_LEVEL'):
+            value = config.get(setting)
+            if value and not isinstance(logging.getLevelName(str(value).strip().upper()), int):
+                logging.getLogger(__name__).warning("Unknown %s %r; using the default level.", setting, value)
+
+        if sampled:
+            @app.before_request
+            def _sample_debug_logging():
+                g.log_debug = random.random() < sample_rate
+
+    def stop(self):
+        """Flush queued records and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+_queue_handler = AppQueueHandler()
+logging_pipeline = PerApp('logging_pipeline', LoggingPipeline)
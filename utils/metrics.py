@@ -0,0 +1,259 @@
+# utils/metrics.py
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from utils.app_state import PerApp
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements are truncated to this many characters in labels and log lines
+MAX_STATEMENT_LENGTH = 200
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _compact(statement):
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH - 3] + '...'
+    return statement
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class QueryTally:
+    """The SQL statements one request has issued so far, from whichever thread ran them."""
+
+    __slots__ = ('endpoint', 'queries', 'db_time', 'slowest')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = None
+
+    def add(self, statement, duration):
+        self.queries += 1
+        self.db_time += duration
+        if self.slowest is None or duration > self.slowest[1]:
+            self.slowest = (statement, duration)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.statuses = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_statement = None
+        self.slowest_duration = 0.0
+
+    def observe(self, status, latency, queries, db_time, slowest):
+        self.count += 1
+        self.latency_sum += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.queries += queries
+        self.db_time += db_time
+        if slowest and slowest[1] > self.slowest_duration:
+            self.slowest_statement, self.slowest_duration = slowest
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency, SQL query count, DB time and slowest statement.
+
+    Queries are timed through SQLAlchemy engine events and attributed to the
+    Flask request that issued them: each request gets a QueryTally, which the
+    write coordinator carries to its thread for the writes it applies on the
+    request's behalf, and a streamed response keeps counting until its body
+    has been sent. Queries outside a request (scheduler, import workers) are
+    only timed for the slow-query log.
+    """
+
+    def __init__(self):
+        self.slow_query_seconds = None
+        self._endpoints = {}  # (endpoint, method) -> EndpointStats
+        self._lock = threading.Lock()
+        self._collectors = []
+        self._local = threading.local()
+
+    def init_app(self, app):
+        slow_ms = app.config.get('SLOW_QUERY_MS')
+        self.slow_query_seconds = slow_ms / 1000.0 if slow_ms else None
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def add_collector(self, collector):
+        """Register a callable returning extra Prometheus text lines for /metrics."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    # -- request hooks ---------------------------------------------------- #
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_tally = QueryTally(request.endpoint or 'unmatched')
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        tally = g.metrics_tally
+        method, path, status = request.method, request.path, response.status_code
+        if response.is_streamed:
+            # The body, and the queries behind it, are produced after this hook returns
+            response.call_on_close(lambda: self._observe(tally, method, path, status, started))
+        else:
+            self._observe(tally, method, path, status, started)
+        return response
+
+    def _observe(self, tally, method, path, status, started):
+        latency = time.perf_counter() - started
+        with self._lock:
+            stats = self._endpoints.setdefault((tally.endpoint, method), EndpointStats())
+            stats.observe(status, latency, tally.queries, tally.db_time, tally.slowest)
+        logger.debug(
+            "%s %s -> %s in %.1fms, %d queries, %.1fms in DB",
+            method, path, status, latency * 1000, tally.queries, tally.db_time * 1000
+        )
+
+    # -- query hooks ------------------------------------------------------ #
+
+    def current_tally(self):
+        """The QueryTally queries on this thread are counted against, or None."""
+        if has_request_context():
+            return g.get('metrics_tally')
+        return getattr(self._local, 'tally', None)
+
+    @contextmanager
+    def attributed_to(self, tally):
+        """Count the queries this thread runs inside the block against another request's tally."""
+        previous = getattr(self._local, 'tally', None)
+        self._local.tally = tally
+        try:
+            yield
+        finally:
+            self._local.tally = previous
+
+    def record_query(self, statement, duration):
+        tally = self.current_tally()
+        if tally is not None:
+            tally.add(statement, duration)
+        if self.slow_query_seconds is not None and duration >= self.slow_query_seconds:
+            where = tally.endpoint if tally is not None else 'background'
+            logger.warning("Slow query (%.1fms, %s): %s", duration * 1000, where, _compact(statement))
+
+    # -- exposition ------------------------------------------------------- #
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines = [
+                '# HELP pennypilot_request_duration_seconds Request latency by endpoint.',
+                '# TYPE pennypilot_request_duration_seconds histogram'
+            ]
+            for (endpoint, method), stats in items:
+                labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'pennypilot_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'pennypilot_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f'pennypilot_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}')
+                lines.append(f'pennypilot_request_duration_seconds_count{{{labels}}} {stats.count}')
+
+            lines += [
+                '# HELP pennypilot_requests_total Requests by endpoint and status code.',
+                '# TYPE pennypilot_requests_total counter'
+            ]
+            for (endpoint, method), stats in items:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'pennypilot_requests_total{{endpoint="{_label(endpoint)}",method="{method}",'
+                        f'status="{status}"}} {count}'
+                    )
+
+            lines += [
+                '# HELP pennypilot_db_queries_total SQL statements executed while serving requests.',
+                '# TYPE pennypilot_db_queries_total counter'
+            ]
+            for (endpoint, method), stats in items:
+                lines.append(
+                    f'pennypilot_db_queries_total{{endpoint="{_label(endpoint)}",method="{method}"}} {stats.queries}'
+                )
+
+            lines += [
+                '# HELP pennypilot_db_seconds_total Time spent executing SQL while serving requests.',
+                '# TYPE pennypilot_db_seconds_total counter'
+            ]
+            for (endpoint, method), stats in items:
+                lines.append(
+                    f'pennypilot_db_seconds_total{{endpoint="{_label(endpoint)}",method="{method}"}} {stats.db_time:.6f}'
+                )
+
+            lines += [
+                '# HELP pennypilot_db_slowest_query_seconds Slowest SQL statement seen per endpoint.',
+                '# TYPE pennypilot_db_slowest_query_seconds gauge'
+            ]
+            for (endpoint, method), stats in items:
+                if stats.slowest_statement is None:
+                    continue
+                lines.append(
+                    f'pennypilot_db_slowest_query_seconds{{endpoint="{_label(endpoint)}",method="{method}",'
+                    f'statement="{_label(_compact(stats.slowest_statement))}"}} {stats.slowest_duration:.6f}'
+                )
+
+        for collector in self._collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+    def response(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+metrics = PerApp('request_metrics', RequestMetrics)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts:
+        duration = time.perf_counter() - starts.pop()[1]
+        # Engines belong to one app, and their statements run inside its app context
+        collector = metrics.for_app()
+        if collector is not None:
+            collector.record_query(statement, duration)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute, so drop its start time here
+    conn = exception_context.connection
+    context = exception_context.execution_context
+    if conn is not None and context is not None:
+        starts = conn.info.get('metrics_query_start')
+        if starts and starts[-1][0] is context:
+            starts.pop()
@@ -0,0 +1,63 @@
+# utils/money.py
+from sqlalchemy import BigInteger, type_coerce
+from sqlalchemy.types import TypeDecorator
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def parse_money(value):
+    """Decimal rounded to the cent from a Decimal, int, float or string; ValueError if not a number."""
+    if isinstance(value, float):
+        # Through repr, so 0.1 becomes 0.10 rather than 0.1000000000000000055...
+        value = repr(value)
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f'Invalid amount: {value!r}')
+    if not amount.is_finite():
+        raise ValueError(f'Invalid amount: {value!r}')
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    """Integer cents for a money value."""
+    if isinstance(value, Decimal) and value.as_tuple().exponent >= -2:
+        return int(value.scaleb(2))
+    return int(parse_money(value).scaleb(2))
+
+
+def from_cents(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def format_cents(cents):
+    """'-12.30' style text for integer cents, without going through Decimal."""
+    sign = '-' if cents < 0 else ''
+    whole, part = divmod(abs(cents), 100)
+    return f'{sign}{whole}.{part:02d}'
+
+
+class Money(TypeDecorator):
+    """
+    Money stored as an integer number of cents.
+
+    Python code on either side of the ORM sees Decimal amounts, as before; in
+    the database the column is a plain integer, so SUM, comparisons and range
+    filters run as exact integer arithmetic in SQLite. Bound values are money
+    amounts (not cents) and are rounded to the cent.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+
+def cents(expression):
+    """Read a Money column or aggregate as raw integer cents, skipping the Decimal conversion."""
+    return type_coerce(expression, BigInteger)
@@ -0,0 +1,71 @@
+# utils/pagination.py
+from models.models import Transaction
+from utils.categories import category_registry
+from sqlalchemy import tuple_
+from datetime import date
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(txn):
+    """Opaque seek position for the row after which the next page starts."""
+    return f"{txn.date.isoformat()}_{txn.id}"
+
+
+def decode_cursor(cursor):
+    date_str, txn_id = cursor.split('_', 1)
+    return date.fromisoformat(date_str), int(txn_id)
+
+
+def transaction_filter_clauses(filters):
+    """
+    WHERE clauses for transaction list filters: start_date, end_date (half-open),
+    category_id, type, min_amount and max_amount, each optional.
+    """
+    clauses = []
+    if filters.get('start_date'):
+        clauses.append(Transaction.date >= filters['start_date'])
+    if filters.get('end_date'):
+        clauses.append(Transaction.date < filters['end_date'])
+    if filters.get('category_id'):
+        clauses.append(Transaction.category_id == filters['category_id'])
+    if filters.get('type'):
+        clauses.append(Transaction.type == filters['type'])
+    if filters.get('min_amount') is not None:
+        clauses.append(Transaction.amount >= filters['min_amount'])
+    if filters.get('max_amount') is not None:
+        clauses.append(Transaction.amount <= filters['max_amount'])
+    return clauses
+
+
+def transaction_page(filters, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of transactions, newest first, using keyset pagination on (date, id).
+
+    `filters` are as for transaction_filter_clauses. Returns (transactions, next_cursor).
+    """
+    query = Transaction.query.filter(*transaction_filter_clauses(filters))
+
+    if cursor:
+        # Seek past the last row of the previous page instead of OFFSET-scanning to it
+        query = query.filter(tuple_(Transaction.date, Transaction.id) < decode_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def serialize_transaction(txn):
+    return {
+        'id': txn.id,
+        'date': txn.date.isoformat(),
+        'category_id': txn.category_id,
+        # From the category registry, so serializing a page never lazy-loads categories
+        'category': category_registry.get().name(txn.category_id),
+        'description': txn.description,
+        'amount': float(txn.amount),
+        'type': txn.type,
+        'recurring': bool(txn.recurring)
+    }
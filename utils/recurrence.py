@@ -0,0 +1,208 @@
+# utils/recurrence.py
+from models.models import db, RecurringTransaction, Transaction, FrequencyEnum
+from utils.rollup import apply_deltas, rows_to_deltas
+from utils.versioning import bump_versions, TRANSACTIONS, RECURRING
+from utils.cache import invalidate_after_commit, tags_for_months
+from utils.money import ZERO
+from utils.categories import category_registry
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from dateutil.relativedelta import relativedelta
+from datetime import date, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Step between two occurrences for each frequency. Occurrences are always computed
+# as anchor + n * step, so a schedule anchored on the 31st clamps to the last day
+# of shorter months without drifting to the 28th afterwards. Fixed-length steps
+# use timedelta, whose arithmetic is an order of magnitude cheaper.
+FREQUENCY_STEPS = {
+    FrequencyEnum.DAILY: timedelta(days=1),
+    FrequencyEnum.WEEKLY: timedelta(weeks=1),
+    FrequencyEnum.MONTHLY: relativedelta(months=1),
+    FrequencyEnum.YEARLY: relativedelta(years=1),
+}
+
+# Widest [start, end) window the calendar feed and forecast expand in one request
+MAX_EXPANSION_DAYS = 3700
+
+
+def coerce_frequency(frequency):
+    """Accept a FrequencyEnum, its name ('MONTHLY') or its value ('Monthly')."""
+    if isinstance(frequency, FrequencyEnum):
+        return frequency
+    try:
+        return FrequencyEnum(frequency)
+    except ValueError:
+        return FrequencyEnum[str(frequency).upper()]
+
+
+def _steps_before(anchor, frequency, start):
+    # Lower bound on the number of occurrences between anchor and start,
+    # so expansion can jump straight to the window instead of walking from the anchor
+    if start <= anchor:
+        return 0
+    if frequency == FrequencyEnum.DAILY:
+        return (start - anchor).days
+    if frequency == FrequencyEnum.WEEKLY:
+        return (start - anchor).days // 7
+    if frequency == FrequencyEnum.MONTHLY:
+        return max((start.year - anchor.year) * 12 + start.month - anchor.month - 1, 0)
+    return max(start.year - anchor.year - 1, 0)
+
+
+def occurrences_between(anchor, frequency, start, end):
+    """Yield the occurrence dates of a schedule within the half-open window [start, end)."""
+    frequency = coerce_frequency(frequency)
+    step = FREQUENCY_STEPS[frequency]
+    n = _steps_before(anchor, frequency, start)
+    while True:
+        occurrence = anchor + step * n
+        if occurrence >= end:
+            return
+        if occurrence >= start:
+            yield occurrence
+        n += 1
+
+
+def next_occurrence(anchor, frequency, after):
+    """First occurrence of a schedule strictly after the given date."""
+    frequency = coerce_frequency(frequency)
+    window_end = after + FREQUENCY_STEPS[frequency] + timedelta(days=1)
+    return next(occurrences_between(anchor, frequency, after + timedelta(days=1), window_end))
+
+
+def schedule_anchor(rule):
+    return rule.start_date or rule.next_date
+
+
+def scheduled_occurrences(start, end):
+    """
+    Yield (rule, dates) for every recurring transaction with occurrences still
+    to be posted within [start, end), `dates` being a lazy iterator over them.
+
+    Occurrences before a rule's next_date have already been posted as ordinary
+    transactions, so each rule is expanded from its next_date onwards, and only
+    over the requested window: the cost follows the occurrences in view, not the
+    age of the schedule or the width of the calendar.
+    """
+    rules = RecurringTransaction.query.filter(RecurringTransaction.next_date < end).all()
+    for rule in rules:
+        yield rule, occurrences_between(schedule_anchor(rule), rule.frequency, max(start, rule.next_date), end)
+
+
+def rule_type(rule, categories=None):
+    return rule.type or (categories or category_registry.get()).type(rule.category_id)
+
+
+def calendar_events(start, end):
+    """FullCalendar event objects for the scheduled occurrences within [start, end)."""
+    categories = category_registry.get()
+    events = []
+    for rule, dates in scheduled_occurrences(start, end):
+        # Everything but the date is the same for all of a rule's occurrences
+        title = f"{rule.description} - ${rule.amount}"
+        group_id = str(rule.id)
+        props = {
+            'recurring_id': rule.id,
+            'amount': float(rule.amount),
+            'type': rule_type(rule, categories),
+            'category': categories.name(rule.category_id, None)
+        }
+        for occurrence in dates:
+            day = occurrence.isoformat()
+            events.append({
+                'id': f"{group_id}:{day}",
+                'groupId': group_id,
+                'title': title,
+                'start': day,
+                'allDay': True,
+                'extendedProps': props
+            })
+    return events
+
+
+def recurring_forecast(start, end):
+    """
+    Projected income and expense per month from the recurring transactions
+    still to be posted within [start, end), as {'YYYY-MM': {'income', 'expense'}}
+    with Decimal amounts. Months without occurrences are omitted.
+    """
+    forecast = {}
+    for rule, dates in scheduled_occurrences(start, end):
+        txn_type = rule_type(rule)
+        if txn_type not in ('Income', 'Expense'):
+            continue
+        key = txn_type.lower()
+        amount = rule.amount
+        for occurrence in dates:
+            month = forecast.setdefault(f"{occurrence.year:04d}-{occurrence.month:02d}",
+                                        {'income': ZERO, 'expense': ZERO})
+            month[key] += amount
+    return forecast
+
+
+def post_due_occurrences(today=None):
+    """
+    Post every missed occurrence of every due recurring transaction up to `today`.
+
+    All occurrences are written in one batched INSERT ... ON CONFLICT DO NOTHING
+    against the (recurring_transaction_id, date) unique key, so overlapping runs
+    are idempotent and never double-post. Returns the number of rows inserted.
+    """
+    today = today or date.today()
+    window_end = today + timedelta(days=1)
+    due_rules = RecurringTransaction.query.filter(RecurringTransaction.next_date <= today).all()
+    categories = category_registry.get()
+
+    rows = []
+    advances = []
+    for rule in due_rules:
+        if rule.category_id is None:
+            logger.warning("Skipping recurring transaction %s: no category assigned.", rule.id)
+            continue
+        anchor = schedule_anchor(rule)
+        txn_type = rule_type(rule, categories)
+        for occurrence in occurrences_between(anchor, rule.frequency, rule.next_date, window_end):
+            rows.append({
+                'date': occurrence,
+                'description': rule.description or '',
+                'amount': rule.amount,
+                'type': txn_type,
+                'recurring': True,
+                'category_id': rule.category_id,
+                'recurring_transaction_id': rule.id
+            })
+        advances.append({
+            'rule_id': rule.id,
+            'new_next_date': next_occurrence(anchor, rule.frequency, today)
+        })
+
+    if not advances:
+        return 0
+
+    table = Transaction.__table__
+    inserted = []
+    if rows:
+        stmt = sqlite_insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.recurring_transaction_id, table.c.date]
+        ).returning(table.c.date, table.c.category_id, table.c.type, table.c.amount)
+        inserted = db.session.execute(stmt, rows).all()
+        # Core inserts bypass the ORM flush listener, so roll up what was actually inserted
+        deltas = rows_to_deltas(inserted)
+        apply_deltas(db.session, deltas)
+        invalidate_after_commit(db.session, tags_for_months(month for month, _, _ in deltas))
+
+    # Only ever move next_date forward, in case a concurrent run got further
+    rule_table = RecurringTransaction.__table__
+    db.session.execute(
+        rule_table.update()
+        .where(rule_table.c.id == db.bindparam('rule_id'))
+        .where(rule_table.c.next_date < db.bindparam('new_next_date'))
+        .values(next_date=db.bindparam('new_next_date')),
+        advances
+    )
+    bump_versions(db.session, [TRANSACTIONS, RECURRING] if inserted else [RECURRING])
+    db.session.commit()
+    logger.info("Posted %s recurring occurrences for %s schedules.", len(inserted), len(advances))
+    return len(inserted)
@@ -0,0 +1,129 @@
+# utils/reports.py
+from models.models import db, Transaction, MonthlyRollup
+from utils.categories import category_registry
+from utils.rollup import month_key
+from utils.money import cents, from_cents
+from sqlalchemy import func, cast, Integer
+from dateutil.relativedelta import relativedelta
+from collections import defaultdict
+from decimal import Decimal
+
+REPORT_TYPES = ('Monthly', 'Quarterly', 'Yearly')
+
+
+def period_bucket(month_expr, report_type):
+    """SQL expression mapping a 'YYYY-MM' string to its report period label."""
+    if report_type == 'Monthly':
+        return month_expr
+    year = func.substr(month_expr, 1, 4)
+    if report_type == 'Yearly':
+        return year
+    quarter = (cast(func.substr(month_expr, 6, 2), Integer) + 2) / 3
+    return func.printf('%s-Q%d', year, quarter)
+
+
+def _live_totals(report_type, start_date, end_date):
+    # Partial months are aggregated straight from the (date-indexed) transaction table
+    bucket = period_bucket(func.strftime('%Y-%m', Transaction.date), report_type)
+    return db.session.query(
+        bucket,
+        Transaction.category_id,
+        Transaction.type,
+        cents(func.sum(Transaction.amount)),
+        func.count(Transaction.id)
+    ).filter(
+        Transaction.date >= start_date,
+        Transaction.date <= end_date
+    ).group_by(bucket, Transaction.category_id, Transaction.type).all()
+
+
+def _rollup_totals(report_type, first_month, last_month):
+    # Whole months come from the pre-aggregated rollup table
+    bucket = period_bucket(MonthlyRollup.month, report_type)
+    return db.session.query(
+        bucket,
+        MonthlyRollup.category_id,
+        MonthlyRollup.type,
+        cents(func.sum(MonthlyRollup.total)),
+        func.sum(MonthlyRollup.count)
+    ).filter(
+        MonthlyRollup.month >= first_month,
+        MonthlyRollup.month <= last_month
+    ).group_by(bucket, MonthlyRollup.category_id, MonthlyRollup.type).all()
+
+
+def period_totals(report_type, start_date, end_date):
+    """
+    Rows of (period, category_id, type, total cents, count) for [start_date, end_date].
+
+    The range is split into whole months, read from the rollup, and the partial
+    months at either end, aggregated live.
+    """
+    first_full = start_date if start_date.day == 1 else start_date.replace(day=1) + relativedelta(months=1)
+    after_last_full = (end_date + relativedelta(days=1)).replace(day=1)
+
+    if first_full >= after_last_full:
+        return _live_totals(report_type, start_date, end_date)
+
+    rows = _rollup_totals(report_type, month_key(first_full), month_key(after_last_full - relativedelta(days=1)))
+    if start_date < first_full:
+        rows += _live_totals(report_type, start_date, first_full - relativedelta(days=1))
+    if after_last_full <= end_date:
+        rows += _live_totals(report_type, after_last_full, end_date)
+    return rows
+
+
+def build_report(report_type, start_date, end_date):
+    """
+    Period x category x type summary for the reports page.
+
+    Returns a list of periods in order, each with income/expense/net totals
+    and its per-category breakdown, plus grand totals.
+    """
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f'Unknown report type: {report_type}')
+
+    # Summed as integer cents; amounts become Decimal once per output row
+    merged = defaultdict(lambda: [0, 0])
+    for period, category_id, txn_type, total, count in period_totals(report_type, start_date, end_date):
+        entry = merged[(period, category_id, txn_type)]
+        entry[0] += total or 0
+        entry[1] += count or 0
+
+    categories = category_registry.get()
+
+    periods = {}
+    for (period, category_id, txn_type), (total, count) in merged.items():
+        if not count:
+            continue
+        total = from_cents(total)
+        summary = periods.setdefault(period, {
+            'period': period,
+            'income': Decimal(0),
+            'expense': Decimal(0),
+            'categories': []
+        })
+        if txn_type == 'Income':
+            summary['income'] += total
+        elif txn_type == 'Expense':
+            summary['expense'] += total
+        summary['categories'].append({
+            'category': categories.name(category_id),
+            'type': txn_type,
+            'total': total,
+            'count': count
+        })
+
+    report = []
+    for period in sorted(periods):
+        summary = periods[period]
+        summary['net'] = summary['income'] - summary['expense']
+        summary['categories'].sort(key=lambda c: (c['type'], -c['total'], c['category']))
+        report.append(summary)
+
+    totals = {
+        'income': sum((p['income'] for p in report), Decimal(0)),
+        'expense': sum((p['expense'] for p in report), Decimal(0))
+    }
+    totals['net'] = totals['income'] - totals['expense']
+    return report, totals
@@ -0,0 +1,190 @@
+# utils/rollup.py
+from models.models import db, Transaction, Category, Budget, MonthlyRollup
+from utils.money import to_cents
+from utils.budgets import sync_budget_alerts
+from sqlalchemy import BigInteger, event, func, inspect, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from collections import defaultdict
+
+
+def month_key(day):
+    """Return the 'YYYY-MM' rollup key for a date."""
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def _committed_value(state, key):
+    # Value of the attribute as it was before the pending changes
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.object, key)
+
+
+def _cents(amount):
+    return 0 if amount is None else to_cents(amount)
+
+
+def _add_delta(deltas, day, category_id, txn_type, cents, count):
+    if day is None or category_id is None:
+        return
+    key = (month_key(day), category_id, txn_type)
+    total, n = deltas[key]
+    deltas[key] = (total + cents, n + count)
+
+
+def rows_to_deltas(rows, sign=1, deltas=None):
+    """
+    Build rollup deltas (in integer cents) from (date, category_id, type, amount)
+    rows, adding to `deltas` if given.
+    """
+    if deltas is None:
+        deltas = defaultdict(lambda: (0, 0))
+    for day, category_id, txn_type, amount in rows:
+        _add_delta(deltas, day, category_id, txn_type, sign * _cents(amount), sign)
+    return deltas
+
+
+def apply_deltas(session, deltas):
+    """
+    Upsert rollup deltas keyed by (month, category_id, type) -> (total cents, count)
+    on `session`'s connection. Used by the flush listener below and by bulk write
+    paths that bypass the ORM. Budgets of the touched (category, month) pairs then
+    get their alerts checked in the same session.
+    """
+    rows = [
+        {
+            'month': month,
+            'category_id': category_id,
+            'type': txn_type,
+            'total': total,
+            'count': count
+        }
+        for (month, category_id, txn_type), (total, count) in deltas.items()
+        if total or count
+    ]
+    if not rows:
+        return
+    table = MonthlyRollup.__table__
+    # Totals are already cents, so bind them as plain integers rather than through Money
+    stmt = sqlite_insert(table).values(total=db.bindparam('total', type_=BigInteger))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.month, table.c.category_id, table.c.type],
+        set_={
+            'total': table.c.total + stmt.excluded.total,
+            'count': table.c.count + stmt.excluded.count
+        }
+    )
+    session.connection().execute(stmt, rows)
+    sync_budget_alerts(session, pairs={(row['category_id'], row['month']) for row in rows})
+
+
+def collect_deltas(session):
+    """Compute rollup deltas for the Transaction rows pending in a session."""
+    deltas = defaultdict(lambda: (0, 0))
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            _add_delta(deltas, obj.date, obj.category_id, obj.type, _cents(obj.amount), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            state = inspect(obj)
+            _add_delta(
+                deltas,
+                _committed_value(state, 'date'),
+                _committed_value(state, 'category_id'),
+                _committed_value(state, 'type'),
+                -_cents(_committed_value(state, 'amount')),
+                -1
+            )
+
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        # Move the old contribution out and the new one in
+        _add_delta(
+            deltas,
+            _committed_value(state, 'date'),
+            _committed_value(state, 'category_id'),
+            _committed_value(state, 'type'),
+            -_cents(_committed_value(state, 'amount')),
+            -1
+        )
+        _add_delta(deltas, obj.date, obj.category_id, obj.type, _cents(obj.amount), 1)
+
+    return deltas
+
+
+@event.listens_for(db.session, 'after_flush')
+def _update_rollup_after_flush(session, flush_context):
+    # new/dirty/deleted and attribute history still reflect the pre-flush state here
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session, deltas)
+
+
+def rebuild_rollup():
+    """Recompute the whole rollup table from the transaction table."""
+    table = MonthlyRollup.__table__
+    month_expr = func.strftime('%Y-%m', Transaction.date)
+    select_stmt = db.select(
+        month_expr,
+        Transaction.category_id,
+        Transaction.type,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).group_by(month_expr, Transaction.category_id, Transaction.type)
+
+    db.session.execute(table.delete())
+    db.session.execute(
+        table.insert().from_select(
+            ['month', 'category_id', 'type', 'total', 'count'],
+            select_stmt
+        )
+    )
+    # Pages served from the rollup may change, so invalidate their validators
+    from utils.versioning import bump_versions, TRANSACTIONS
+    bump_versions(db.session, [TRANSACTIONS])
+    # Existing breaches are recorded, not announced as new events
+    sync_budget_alerts(db.session, budget_ids=db.session.scalars(db.select(Budget.id)).all(), announce=False)
+    db.session.commit()
+    return db.session.query(func.count()).select_from(table).scalar()
+
+
+def closed_month_totals(until):
+    """Per (month, category) totals from the rollup for every month before the one containing `until`."""
+    return db.session.query(
+        MonthlyRollup.month,
+        Category.name,
+        Category.type,
+        func.sum(MonthlyRollup.total)
+    ).join(Category, Category.id == MonthlyRollup.category_id).filter(
+        MonthlyRollup.month < month_key(until)
+    ).group_by(MonthlyRollup.month, Category.id).all()
+
+
+def current_month_totals(until):
+    """
+    Per category totals for the month containing `until`, aggregated live so
+    that future-dated rows in that month are excluded.
+    """
+    return db.session.query(
+        literal(month_key(until)),
+        Category.name,
+        Category.type,
+        func.sum(Transaction.amount)
+    ).join(Category).filter(
+        Transaction.date >= until.replace(day=1),
+        Transaction.date <= until
+    ).group_by(Category.id).all()
+
+
+def monthly_category_totals(until):
+    """
+    Per (month, category) totals for every transaction dated on or before `until`.
+    Returns rows of (month, category_name, category_type, total).
+    """
+    return closed_month_totals(until) + current_month_totals(until)
@@ -0,0 +1,168 @@
+# utils/scheduler.py
+from models.models import db, SchedulerLease
+from utils.app_state import PerApp
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEASE = 'scheduler'
+
+
+def _holder_id():
+    # Unique per process, and readable enough to tell which worker is leading
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class LeaderElection:
+    """
+    Elects one process, among all that share the database, to run a role.
+
+    Each candidate runs a heartbeat thread that tries to take or renew a lease
+    row every SCHEDULER_HEARTBEAT_SECONDS. The claim is a single upsert that
+    only succeeds when the row is free, expired, or already ours, so at most one
+    holder exists at a time. The winner's `on_elected` callback runs once; if it
+    later fails to renew before its lease runs out, `on_demoted` runs and the
+    role passes to whichever peer claims the expired row first. Stopping a
+    leader releases the lease so a peer can take over on its next heartbeat.
+    """
+
+    def __init__(self, name=SCHEDULER_LEASE):
+        self.name = name
+        self.holder = None
+        self.app = None
+        self.lease_seconds = 60
+        self.heartbeat_seconds = 15
+        self.on_elected = None
+        self.on_demoted = None
+        self._leader_until = 0.0  # time.monotonic() deadline of the lease we hold
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.lease_seconds = app.config['SCHEDULER_LEASE_SECONDS']
+        self.heartbeat_seconds = min(app.config['SCHEDULER_HEARTBEAT_SECONDS'], self.lease_seconds / 2)
+
+    def start(self, on_elected, on_demoted):
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        # Chosen here rather than at import, so workers forked from a preloaded app differ
+        self.holder = _holder_id()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f'{self.name}-election', daemon=True)
+        self._thread.start()
+        logger.info("Candidate %s joined the %s election.", self.holder, self.name)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def is_leader(self):
+        """True while this process holds an unexpired lease; jobs check it before doing work."""
+        return time.monotonic() < self._leader_until
+
+    # -- heartbeat thread ------------------------------------------------- #
+
+    def _loop(self):
+        with self.app.app_context():
+            try:
+                while not self._stop.is_set():
+                    self._heartbeat()
+                    self._stop.wait(self.heartbeat_seconds)
+            finally:
+                if self._leader_until:
+                    self._demote(lost=False)
+                    self._release()
+
+    def _heartbeat(self):
+        started = time.monotonic()
+        failed = False
+        try:
+            acquired = self._claim()
+        except Exception as e:
+            db.session.rollback()
+            acquired, failed = False, True
+            logger.warning("Could not renew the %s lease: %s", self.name, e)
+        finally:
+            db.session.remove()
+
+        if acquired:
+            was_leader = self.is_leader()
+            # Measured from before the claim, so we never believe in a lease longer than peers do
+            self._leader_until = started + self.lease_seconds
+            if not was_leader:
+                logger.info("%s acquired the %s lease.", self.holder, self.name)
+                self._run_callback(self.on_elected)
+        elif self._leader_until and (not failed or not self.is_leader()):
+            # A peer took the lease, or the database stayed unreachable until ours lapsed
+            self._demote()
+
+    def _claim(self):
+        """Take or renew the lease in one statement; True if we hold it afterwards."""
+        now = datetime.utcnow()
+        table = SchedulerLease.__table__
+        stmt = sqlite_insert(table).values(
+            name=self.name,
+            holder=self.holder,
+            expires_at=now + timedelta(seconds=self.lease_seconds),
+            renewed_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={
+                'holder': stmt.excluded.holder,
+                'expires_at': stmt.excluded.expires_at,
+                'renewed_at': stmt.excluded.renewed_at
+            },
+            where=(table.c.holder == self.holder) | (table.c.expires_at < now)
+        ).returning(table.c.holder)
+        row = db.session.connection().execute(stmt).first()
+        db.session.commit()
+        return row is not None
+
+    def _demote(self, lost=True):
+        self._leader_until = 0.0
+        if lost:
+            logger.warning("%s lost the %s lease.", self.holder, self.name)
+        self._run_callback(self.on_demoted)
+
+    def _release(self):
+        try:
+            db.session.execute(
+                db.update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            db.session.commit()
+            logger.info("%s released the %s lease.", self.holder, self.name)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Could not release the %s lease: %s", self.name, e)
+        finally:
+            db.session.remove()
+
+    def _run_callback(self, callback):
+        if callback is None:
+            return
+        try:
+            callback(self.app)
+        except Exception as e:
+            logger.error("Error in %s election callback: %s", self.name, e)
+            logger.debug("Traceback:", exc_info=True)
+
+
+scheduler_election = PerApp('scheduler_election', LeaderElection)
@@ -0,0 +1,125 @@
+# utils/search.py
+from models.models import db, Transaction
+from utils.pagination import transaction_filter_clauses
+from sqlalchemy import column, table, text
+import re
+
+SEARCH_TABLE = 'transaction_fts'
+DEFAULT_SEARCH_PAGE_SIZE = 25
+MAX_SEARCH_PAGE_SIZE = 200
+# Deep pages of a relevance ranking are rarely useful and cost a full sort each
+MAX_SEARCH_PAGE = 100
+# Ranking scores every match, so broader queries are listed newest first instead
+MAX_RANKED_MATCHES = 5000
+
+# External-content index over transaction.description: the text lives only in
+# the transaction table, and triggers keep the index in step with every write
+# path, ORM flushes and Core bulk inserts alike. The prefix indexes make
+# 2- and 3-character prefix queries index lookups instead of term scans.
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        description,
+        content='transaction',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF description ON "transaction" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {SEARCH_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+]
+
+search_index = table(SEARCH_TABLE, column('rowid'), column('rank'), column(SEARCH_TABLE))
+
+# A double-quoted phrase, or a bare word optionally ending in * for a prefix match
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r'\w+')
+
+
+def search_index_exists(connection):
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+    ).first() is not None
+
+
+def install_search_index(connection):
+    """Create the index and its triggers if missing; True if the index table was new."""
+    created = not search_index_exists(connection)
+    for statement in SEARCH_DDL:
+        connection.execute(text(statement))
+    return created
+
+
+def rebuild_search_index():
+    """Re-index every transaction description; returns the number of rows indexed."""
+    connection = db.session.connection()
+    install_search_index(connection)
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    # Merge the freshly written segments so the first searches do not pay for it
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    return db.session.query(db.func.count(Transaction.id)).scalar()
+
+
+def to_match_expression(user_query):
+    """
+    Translate a user query into an FTS5 MATCH expression, or None if it has no terms.
+
+    "exact phrase" matches the words in order, fuel* matches any word starting
+    with "fuel", and every other word must appear. Operators and column filters
+    in the input are not interpreted, so arbitrary text is always a valid query.
+    """
+    parts = []
+    for phrase, word in _QUERY_TOKEN.findall(user_query or ''):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                parts.append('"' + ' '.join(words) + '"')
+            continue
+        words = _WORD.findall(word)
+        if not words:
+            continue
+        # Punctuation inside a word (e.g. "e-bike") splits it the way the tokenizer does
+        term = '"' + ' '.join(words) + '"'
+        if word.endswith('*'):
+            term += '*'
+        parts.append(term)
+    return ' '.join(parts) or None
+
+
+def search_transactions(user_query, filters=None, page=1, limit=DEFAULT_SEARCH_PAGE_SIZE):
+    """
+    One page of transactions whose description matches `user_query`.
+    `filters` are as for transaction_filter_clauses.
+
+    Results are ranked best match first (BM25) when the query matches at most
+    MAX_RANKED_MATCHES rows. Scoring a broader query would mean scoring every
+    match, so those are listed newest first (by date, then id) instead.
+    Returns (transactions, has_more, ranked).
+    """
+    expression = to_match_expression(user_query)
+    if expression is None:
+        return [], False, True
+    filters = filters or {}
+    match = search_index.c[SEARCH_TABLE].op('MATCH')(expression)
+
+    # Counting matches only walks the index's doclists, with no scoring
+    matches = db.session.query(db.func.count()).select_from(search_index).filter(match).scalar()
+    ranked = matches <= MAX_RANKED_MATCHES
+
+    query = Transaction.query.join(search_index, search_index.c.rowid == Transaction.id)\
+        .filter(match, *transaction_filter_clauses(filters))
+
+    if ranked:
+        query = query.order_by(search_index.c.rank, Transaction.date.desc(), Transaction.id.desc())
+    else:
+        query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+    rows = query.offset((page - 1) * limit).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit, ranked
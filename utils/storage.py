@@ -0,0 +1,121 @@
+# utils/storage.py
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+import threading
+
+READ_METHODS = ('GET', 'HEAD')
+READ_URL_KEY = 'sqlite_read_url'
+READ_ENGINE_KEY = 'sqlite_read_engine'
+
+_read_engine_lock = threading.Lock()
+
+
+def is_sqlite_file(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') \
+        and not url.database.startswith('file:')
+
+
+def _set_pragmas(config, read_only):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if read_only:
+                cursor.execute('PRAGMA query_only=ON')
+            elif config['SQLITE_WAL']:
+                # Persistent: once set, every connection to the file uses WAL
+                cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+            cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+            # A negative cache_size is in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def init_storage(app, db):
+    """
+    Apply the SQLite storage profile and initialise Flask-SQLAlchemy.
+
+    For a file database, the default engine becomes the single writer: a pool
+    of exactly one connection, so writes queue in the pool instead of fighting
+    over the file lock. GET and HEAD requests read through a separate
+    read-only pool, which in WAL mode never waits on that writer.
+    """
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if is_sqlite_file(url):
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', 1)
+        options.setdefault('max_overflow', 0)
+        options.setdefault('pool_timeout', app.config['SQLITE_WRITE_TIMEOUT'])
+
+    db.init_app(app)
+
+    if not is_sqlite_file(url):
+        return
+    with app.app_context():
+        event.listen(db.engine, 'connect', _set_pragmas(app.config, read_only=False))
+        if app.config['SQLITE_READ_POOL_SIZE'] > 0:
+            # Taken after init_app so a relative path already points into the instance folder
+            app.extensions[READ_URL_KEY] = db.engine.url.set(
+                database=f'file:{db.engine.url.database}',
+                query={'mode': 'ro', 'uri': 'true'}
+            )
+
+
+def read_engine():
+    """The current app's read-only engine, created on first use; None if reads are not split."""
+    extensions = current_app.extensions
+    engine = extensions.get(READ_ENGINE_KEY)
+    if engine is None and READ_URL_KEY in extensions:
+        with _read_engine_lock:
+            engine = extensions.get(READ_ENGINE_KEY)
+            if engine is None:
+                config = current_app.config
+                engine = create_engine(
+                    extensions[READ_URL_KEY],
+                    pool_size=config['SQLITE_READ_POOL_SIZE'],
+                    max_overflow=0,
+                    pool_timeout=config['SQLITE_WRITE_TIMEOUT']
+                )
+                event.listen(engine, 'connect', _set_pragmas(config, read_only=True))
+                extensions[READ_ENGINE_KEY] = engine
+    return engine
+
+
+def _is_write(clause):
+    return clause is not None and (getattr(clause, 'is_dml', False) or getattr(clause, 'is_ddl', False))
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads made while serving GET/HEAD requests (or any
+    request, under the write coordinator) to the read-only pool. Flushes, DML, and anything after the first write in a
+    transaction go to the writer, so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause) \
+                and not self.info.get('uses_writer') \
+                and has_request_context() and self._reads_split():
+            engine = read_engine()
+            if engine is not None:
+                return engine
+        if bind is None:
+            self.info['uses_writer'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _reads_split():
+        # With the write coordinator, requests never write on their own session, so
+        # all of their reads can leave the writer connection free for the writer thread
+        return request.method in READ_METHODS or current_app.config.get('WRITE_COORDINATOR', False)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _release_writer(session):
+    session.info.pop('uses_writer', None)
@@ -0,0 +1,196 @@
+# utils/synthetic.py
+from models.models import (
+    db, Category, Transaction, Budget, RecurringTransaction, SavingsAccount, FrequencyEnum
+)
+from utils.rollup import rebuild_rollup
+from utils.recurrence import next_occurrence
+from utils.versioning import bump_versions, CATEGORIES, BUDGETS, RECURRING, SAVINGS
+from utils.money import from_cents
+from sqlalchemy import BigInteger
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from bisect import bisect_left
+from dateutil.relativedelta import relativedelta
+from datetime import date, timedelta
+import logging
+import math
+import random
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHUNK_SIZE = 20000
+
+# name -> (type, share of transactions, median amount, log-normal sigma)
+CATEGORY_PROFILES = {
+    'Salary': ('Income', 0.015, 2600.0, 0.05),
+    'Freelance': ('Income', 0.015, 400.0, 0.7),
+    'Food': ('Expense', 0.30, 22.0, 0.6),
+    'Groceries': ('Expense', 0.18, 55.0, 0.5),
+    'Transport': ('Expense', 0.12, 14.0, 0.7),
+    'Entertainment': ('Expense', 0.10, 28.0, 0.8),
+    'Shopping': ('Expense', 0.11, 45.0, 0.9),
+    'Utilities': ('Expense', 0.04, 85.0, 0.3),
+    'Health': ('Expense', 0.04, 60.0, 0.8),
+    'Travel': ('Expense', 0.03, 250.0, 0.9),
+    'Rent': ('Expense', 0.02, 1400.0, 0.05),
+}
+
+DESCRIPTIONS = {
+    'Salary': ['Payroll', 'Monthly salary'],
+    'Freelance': ['Client invoice', 'Consulting', 'Design work'],
+    'Food': ['Lunch', 'Coffee', 'Dinner out', 'Takeaway', 'Bakery'],
+    'Groceries': ['Supermarket', 'Farmers market', 'Corner shop'],
+    'Transport': ['Bus fare', 'Fuel', 'Train ticket', 'Taxi', 'Parking'],
+    'Entertainment': ['Cinema', 'Concert', 'Streaming', 'Games', 'Books'],
+    'Shopping': ['Clothes', 'Electronics', 'Home goods', 'Gifts'],
+    'Utilities': ['Electricity', 'Water', 'Internet', 'Phone'],
+    'Health': ['Pharmacy', 'Dentist', 'Gym', 'Doctor'],
+    'Travel': ['Hotel', 'Flight', 'Car rental'],
+    'Rent': ['Rent'],
+}
+
+# Relative transaction volume per weekday, Monday first
+WEEKDAY_WEIGHTS = (0.9, 0.9, 0.95, 1.0, 1.2, 1.35, 1.1)
+
+
+def ensure_categories():
+    """Create any missing profile categories; return name -> (id, type)."""
+    existing = {name for (name,) in db.session.query(Category.name)}
+    db.session.add_all(
+        Category(name=name, type=profile[0])
+        for name, profile in CATEGORY_PROFILES.items() if name not in existing
+    )
+    db.session.commit()
+    return {name: (id_, type_) for id_, name, type_ in db.session.query(Category.id, Category.name, Category.type)}
+
+
+def _daily_counts(transactions, start, end):
+    """Spread `transactions` over [start, end] by weekday weight, summing exactly."""
+    days = (end - start).days + 1
+    weights = [WEEKDAY_WEIGHTS[(start + timedelta(days=i)).weekday()] for i in range(days)]
+    scale = transactions / sum(weights)
+    carry = 0.0
+    for i, weight in enumerate(weights):
+        carry += weight * scale
+        count = int(carry)
+        carry -= count
+        if i == days - 1:
+            count += round(carry)
+        yield start + timedelta(days=i), count
+
+
+def iter_transactions(transactions, start, end, categories, rng):
+    """Yield transaction mappings in date order with weighted categories and log-normal amounts in cents."""
+    names = [name for name in CATEGORY_PROFILES if name in categories]
+    cumulative = []
+    total = 0.0
+    for name in names:
+        total += CATEGORY_PROFILES[name][1]
+        cumulative.append(total)
+
+    for day, count in _daily_counts(transactions, start, end):
+        for _ in range(count):
+            name = names[min(bisect_left(cumulative, rng.random() * total), len(names) - 1)]
+            txn_type, share, median, sigma = CATEGORY_PROFILES[name]
+            cents = round(rng.lognormvariate(math.log(median), sigma) * 100)
+            yield {
+                'date': day,
+                'description': rng.choice(DESCRIPTIONS[name]),
+                'amount': max(cents, 1),
+                'type': categories[name][1],
+                'recurring': False,
+                'category_id': categories[name][0],
+                'recurring_transaction_id': None
+            }
+
+
+def _budget_rows(transactions, start, end, categories, rng):
+    # Budgets sit around each category's expected monthly spend
+    months = max(1, (end.year - start.year) * 12 + end.month - start.month + 1)
+    per_month = transactions / months
+    rows = []
+    month = start.replace(day=1)
+    while month <= end:
+        for name, (txn_type, share, median, sigma) in CATEGORY_PROFILES.items():
+            if txn_type != 'Expense' or name not in categories:
+                continue
+            expected = per_month * share * median * math.exp(sigma ** 2 / 2)
+            rows.append({
+                'category_id': categories[name][0],
+                'month': month.strftime('%Y-%m'),
+                'amount': from_cents(int(round(expected * rng.uniform(0.85, 1.25), -1)) * 100 or 1000)
+            })
+        month += relativedelta(months=1)
+    return rows
+
+
+def _recurring_rules(start, today, categories):
+    rules = [
+        ('Salary', 'Monthly salary', 2600.0, FrequencyEnum.MONTHLY),
+        ('Rent', 'Rent', 1400.0, FrequencyEnum.MONTHLY),
+        ('Utilities', 'Internet', 45.0, FrequencyEnum.MONTHLY),
+        ('Entertainment', 'Streaming subscription', 12.99, FrequencyEnum.MONTHLY),
+        ('Health', 'Gym membership', 9.5, FrequencyEnum.WEEKLY),
+        ('Shopping', 'Annual membership', 120.0, FrequencyEnum.YEARLY),
+    ]
+    for name, description, amount, frequency in rules:
+        if name not in categories:
+            continue
+        # Anchored in the past but already caught up, so generating never posts anything
+        yield RecurringTransaction(
+            description=description,
+            amount=amount,
+            frequency=frequency,
+            start_date=start,
+            next_date=next_occurrence(start, frequency, today),
+            category_id=categories[name][0],
+            type=categories[name][1]
+        )
+
+
+def generate_ledger(transactions=10000, years=3, seed=42, end=None):
+    """
+    Fill the database with a synthetic ledger of `transactions` rows spread over
+    the `years` up to `end` (today by default), plus monthly budgets, recurring
+    rules and savings accounts. Deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - relativedelta(years=years) + timedelta(days=1)
+    categories = ensure_categories()
+
+    table = Transaction.__table__
+    # Generated amounts are already cents; bind them as integers instead of through Money
+    insert_stmt = table.insert().values(amount=db.bindparam('amount', type_=BigInteger))
+    chunk = []
+    inserted = 0
+    for mapping in iter_transactions(transactions, start, end, categories, rng):
+        chunk.append(mapping)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            db.session.execute(insert_stmt, chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            chunk.clear()
+            logger.info("Generated %s/%s transactions.", inserted, transactions)
+    if chunk:
+        db.session.execute(insert_stmt, chunk)
+        inserted += len(chunk)
+
+    budget_rows = _budget_rows(transactions, start, end, categories, rng)
+    db.session.execute(sqlite_insert(Budget.__table__).on_conflict_do_nothing(), budget_rows)
+    db.session.add_all(_recurring_rules(start, end, categories))
+    db.session.add_all(
+        SavingsAccount(account_name=name, balance=from_cents(round(rng.uniform(500, 20000) * 100)))
+        for name in ('Emergency fund', 'Holiday', 'House deposit')
+    )
+    # Core inserts above bypass the flush listeners
+    bump_versions(db.session, [CATEGORIES, BUDGETS, RECURRING, SAVINGS])
+    db.session.commit()
+
+    # One set-based pass is far cheaper than per-chunk rollup upserts
+    rebuild_rollup()
+    return {
+        'transactions': inserted,
+        'budgets': len(budget_rows),
+        'start': start,
+        'end': end
+    }
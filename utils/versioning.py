@@ -0,0 +1,131 @@
+# utils/versioning.py
+from models.models import (
+    db, Transaction, Category, Budget, RecurringTransaction, SavingsAccount, DataVersion
+)
+from flask import request, session, make_response, current_app
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, date
+from functools import wraps
+import hashlib
+
+# Logical tables whose writes are versioned. Derived tables (the monthly
+# rollup) follow their source table and are not tracked separately.
+TRANSACTIONS = 'transactions'
+CATEGORIES = 'categories'
+BUDGETS = 'budgets'
+RECURRING = 'recurring'
+SAVINGS = 'savings'
+
+MODEL_TABLES = {
+    Transaction: TRANSACTIONS,
+    Category: CATEGORIES,
+    Budget: BUDGETS,
+    RecurringTransaction: RECURRING,
+    SavingsAccount: SAVINGS,
+}
+
+
+def bump_versions(session, names):
+    """
+    Increment the data version of each named table, inside the session's transaction.
+    The new versions are kept in session.info['bumped_versions'] until commit.
+    """
+    names = sorted(set(names))
+    if not names:
+        return
+    now = datetime.utcnow()
+    table = DataVersion.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'version': table.c.version + 1, 'updated_at': stmt.excluded.updated_at}
+    ).returning(table.c.name, table.c.version)
+    rows = session.connection().execute(
+        stmt, [{'name': name, 'version': 1, 'updated_at': now} for name in names]
+    ).all()
+    bumped = session.info.setdefault('bumped_versions', {})
+    for name, version in rows:
+        bumped.setdefault(name, []).append(version)
+
+
+def changed_tables(session):
+    names = set()
+    for obj in list(session.new) + list(session.deleted):
+        name = MODEL_TABLES.get(type(obj))
+        if name:
+            names.add(name)
+    for obj in session.dirty:
+        name = MODEL_TABLES.get(type(obj))
+        if name and session.is_modified(obj):
+            names.add(name)
+    return names
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_versions_after_flush(session, flush_context):
+    names = changed_tables(session)
+    if names:
+        bump_versions(session, names)
+
+
+def current_versions(names):
+    """Return ({name: version}, last_modified) for the given tables."""
+    rows = db.session.query(DataVersion.name, DataVersion.version, DataVersion.updated_at).filter(
+        DataVersion.name.in_(names)
+    ).all()
+    versions = {name: 0 for name in names}
+    last_modified = None
+    for name, version, updated_at in rows:
+        versions[name] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+def compute_etag(versions, per_day=False, html=True):
+    parts = [request.endpoint, request.full_path]
+    parts += [f"{name}={versions[name]}" for name in sorted(versions)]
+    if per_day:
+        # Views that cut off at "today" change at midnight even without writes
+        parts.append(date.today().isoformat())
+    if html:
+        # Rendered pages embed a session-bound CSRF token that expires after
+        # WTF_CSRF_TIME_LIMIT, so only reuse them within the same session and window
+        time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT') or 3600
+        parts.append(str(session.get('csrf_token', '')))
+        parts.append(str(int(datetime.utcnow().timestamp() // time_limit)))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def conditional_get(*names, per_day=False, html=True):
+    """
+    Answer GET requests with 304 Not Modified when none of the named tables
+    changed since the client's copy, without running the view's queries.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages must be rendered, so never short-circuit those
+            if request.method != 'GET' or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            versions, last_modified = current_versions(names)
+            etag = compute_etag(versions, per_day=per_day, html=html)
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Rendering may have created the session's CSRF token
+                etag = compute_etag(versions, per_day=per_day, html=html)
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Always revalidate; the ETag makes revalidation nearly free
+            response.cache_control.no_cache = True
+            response.cache_control.private = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,179 @@
+# utils/writer.py
+from models.models import db
+from utils.metrics import metrics
+from utils.app_state import PerApp
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteRejected(Exception):
+    """Raised by a write operation to refuse the change with a message for the user."""
+
+
+class _PendingWrite:
+    __slots__ = ('fn', 'future', 'tally')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+        # The statements run for this write count towards the request that queued it
+        self.tally = metrics.current_tally()
+
+    def apply(self, flush=False):
+        with metrics.attributed_to(self.tally):
+            result = self.fn()
+            if flush:
+                db.session.flush()
+        return result
+
+
+class WriteCoordinator:
+    """
+    Funnels mutations through one writer thread that group-commits them.
+
+    `run(fn)` queues `fn`, which performs its changes on `db.session` and
+    returns a plain value (not an ORM instance, which would be expired by the
+    time the caller sees it). The writer collects whatever else arrives within
+    WRITE_BATCH_WINDOW_MS, applies the whole batch in a single transaction and
+    commits once. If any operation fails, the batch is rolled back and replayed
+    one operation per transaction, so a bad write never fails its neighbours.
+
+    With WRITE_COORDINATOR off, `run` executes and commits in the caller's session.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.window = 0.005
+        self.max_batch = 100
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['WRITE_COORDINATOR']
+        self.window = app.config['WRITE_BATCH_WINDOW_MS'] / 1000.0
+        self.max_batch = app.config['WRITE_BATCH_MAX']
+
+    def run(self, fn, timeout=None):
+        """Apply `fn` and commit; return its result or raise its exception."""
+        if not self.enabled or threading.current_thread() is self._thread:
+            try:
+                result = fn()
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+        self._ensure_started()
+        pending = _PendingWrite(fn)
+        self._queue.put(pending)
+        return pending.future.result(timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join()
+                self._thread = None
+
+    # -- writer thread ---------------------------------------------------- #
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name='write-coordinator', daemon=True)
+                    self._thread.start()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        with self.app.app_context():
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                try:
+                    self._commit_batch(batch)
+                except Exception as e:
+                    # Never leave a caller waiting forever
+                    logger.error("Write coordinator failed a batch of %s: %s", len(batch), e)
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+                finally:
+                    db.session.remove()
+
+    def _commit_batch(self, batch):
+        self.batches += 1
+        self.writes += len(batch)
+        results = []
+        try:
+            for pending in batch:
+                # Surface constraint errors here rather than at commit, where they cannot be attributed
+                results.append(pending.apply(flush=True))
+            # The shared commit is counted against the write that opened the batch
+            with metrics.attributed_to(batch[0].tally):
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            logger.warning("Replaying a batch of %s writes one at a time after a failure.", len(batch))
+            for pending in batch:
+                try:
+                    with metrics.attributed_to(pending.tally):
+                        result = pending.fn()
+                        db.session.commit()
+                    pending.future.set_result(result)
+                except Exception as e:
+                    db.session.rollback()
+                    pending.future.set_exception(e)
+            return
+        for pending, result in zip(batch, results):
+            pending.future.set_result(result)
+
+    def prometheus_lines(self):
+        return [
+            '# HELP pennypilot_write_batches_total Transactions committed by the write coordinator.',
+            '# TYPE pennypilot_write_batches_total counter',
+            f'pennypilot_write_batches_total {self.batches}',
+            '# HELP pennypilot_writes_total Write operations applied by the write coordinator.',
+            '# TYPE pennypilot_writes_total counter',
+            f'pennypilot_writes_total {self.writes}',
+            '# HELP pennypilot_write_queue_depth Write operations waiting for the writer thread.',
+            '# TYPE pennypilot_write_queue_depth gauge',
+            f'pennypilot_write_queue_depth {self._queue.qsize()}'
+        ]
+
+
+# One writer thread per app, applying writes with that app's session and engine
+writes = PerApp('write_coordinator', WriteCoordinator)